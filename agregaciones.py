@@ -0,0 +1,66 @@
+# Dimensiones del cubo: Mes_Label acompaña a Mes (uno a uno) para no tener que volver a calcularla
+DIMENSIONES = ["Mes", "Mes_Label", "Tipo", "Categoría", "Detalle"]
+
+
+# Cubo Mes × Tipo × Categoría × Detalle -> suma y cantidad, en una sola pasada sobre el resumen.
+# Ya viene filtrado por los tipos seleccionados (los ahorros son egresos de la categoría Ahorros)
+# y por la subcategoría; los periodos se eligen después al cortar el cubo.
+def construir_cubo(df, tipos_seleccionados, subdetalle=None):
+    base = df
+    if subdetalle:
+        base = base[base["Detalle"] == subdetalle]
+    con_ahorros = "Ahorros" in tipos_seleccionados
+    base = base[base["Tipo"].isin(tipos_seleccionados) | (con_ahorros & (base["Categoría"] == "Ahorros"))]
+    return base.groupby(DIMENSIONES, observed=True, as_index=False).agg(
+        Monto=("Monto", "sum"), Cantidad=("Cantidad", "sum")
+    )
+
+
+def _en_periodo(cubo, meses):
+    return cubo[cubo["Mes"].isin(meses)]
+
+
+# Indicadores generales. Los ahorros (solo si se eligió "Ahorros") suman todos los periodos cargados, como siempre se mostró.
+def totales(cubo, meses, tipos_seleccionados):
+    periodo = _en_periodo(cubo, meses)
+    es_ahorro = (cubo["Categoría"] == "Ahorros") & ("Ahorros" in tipos_seleccionados)
+    total_ingresos = periodo.loc[periodo["Tipo"] == "Ingreso", "Monto"].sum()
+    total_egresos = periodo.loc[(periodo["Tipo"] == "Egreso") & (periodo["Categoría"] != "Ahorros"), "Monto"].sum()
+    variacion = total_ingresos - total_egresos
+    return {
+        "ingresos": total_ingresos,
+        "egresos": total_egresos,
+        "ahorros": cubo.loc[(cubo["Tipo"] == "Egreso") & es_ahorro, "Monto"].sum(),
+        "variacion": variacion,
+        "porcentaje": (variacion / total_ingresos) * 100 if total_ingresos else -100,
+    }
+
+
+# Evolutivo por mes y tipo (todos los periodos)
+def por_mes_tipo(cubo):
+    return cubo.groupby(["Mes_Label", "Tipo"], observed=False)["Monto"].sum().reset_index()
+
+
+def por_categoria(cubo, meses):
+    return _en_periodo(cubo, meses).groupby(["Tipo", "Categoría"])["Monto"].sum().reset_index()
+
+
+def _variacion(df, indice):
+    tabla = df.pivot_table(index=indice, columns="Tipo", values="Monto", aggfunc="sum", fill_value=0, observed=False).reset_index()
+    tabla["Variación"] = tabla.get("Ingreso", 0) - tabla.get("Egreso", 0)
+    return tabla
+
+
+# Ingreso - Egreso por mes (todos los periodos)
+def variacion_mensual(cubo):
+    return _variacion(cubo, ["Mes_Label"])
+
+
+def variacion_por_categoria(cubo, meses):
+    return _variacion(_en_periodo(cubo, meses), "Categoría")
+
+
+# Detalle × Tipo dentro de una categoría, para las comparativas de Vivienda y Servicios
+def por_detalle(cubo, meses, categoria):
+    periodo = _en_periodo(cubo, meses)
+    return periodo[periodo["Categoría"] == categoria].groupby(["Detalle", "Tipo"])["Monto"].sum().reset_index()
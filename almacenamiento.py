@@ -0,0 +1,449 @@
+import argparse
+import copy
+import json
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+
+import pandas as pd
+
+import datos
+from datos import COLUMNAS, CAMPOS_FECHA, MARGEN_SINCRONIZACION
+from esquema import tipar, sin_tipos
+from resumenes import calcular_resumen, columnas_resumen
+
+
+# Operaciones que la app necesita del almacenamiento. Cada motor las implementa a su manera;
+# la app solo habla con el repositorio elegido en la configuración (BACKEND). Un motor al que le
+# falte una operación falla al crearlo, no a mitad de una sesión.
+class Repositorio(ABC):
+    # Con usuario, las lecturas, el resumen y los avisos de cambios solo traen sus movimientos
+    usuario = None
+
+    # El mismo almacenamiento (conexión, archivo o datos en memoria) visto por un solo usuario
+    def de_usuario(self, usuario):
+        vista = copy.copy(self)
+        vista.usuario = usuario
+        return vista
+
+    @abstractmethod
+    def verificar_credenciales(self, usuario, password):
+        ...
+
+    # Todos los movimientos como DataFrame (columnas COLUMNAS + id, o solo las columnas pedidas + id)
+    @abstractmethod
+    def cargar_movimientos(self, columnas=None):
+        ...
+
+    # Movimientos creados o actualizados y lápidas de eliminados desde la marca: (DataFrame, {id: fecha})
+    @abstractmethod
+    def cargar_cambios(self, marca):
+        ...
+
+    @abstractmethod
+    def cargar_filtrado(self, tipos=None, categoria=None, mes=None, columnas=None):
+        ...
+
+    @abstractmethod
+    def meses_disponibles(self):
+        ...
+
+    # Sumas por (Usuario, Mes, Tipo, Categoría, Detalle) con las columnas de resumenes.calcular_resumen.
+    # Con columnas solo vienen esas más Cantidad (ver resumenes.columnas_resumen);
+    # con desde/hasta, solo los meses con desde <= Fecha_Real < hasta.
+    @abstractmethod
+    def cargar_resumen(self, tipos=None, categoria=None, columnas=None, desde=None, hasta=None):
+        ...
+
+    # Id para un movimiento nuevo, conocido antes de escribirlo
+    def nuevo_id(self):
+        return uuid.uuid4().hex
+
+    # Guarda un movimiento nuevo (con el id dado o uno nuevo) y devuelve su id
+    @abstractmethod
+    def agregar(self, registro, doc_id=None):
+        ...
+
+    @abstractmethod
+    def actualizar(self, doc_id, cambios):
+        ...
+
+    @abstractmethod
+    def eliminar(self, doc_id):
+        ...
+
+    # Guarda un lote de (id, registro); devuelve False si ya se había guardado antes
+    @abstractmethod
+    def escribir_lote(self, lote):
+        ...
+
+    # Actualiza un lote de (id, registro anterior, cambios) de una sola vez
+    @abstractmethod
+    def actualizar_lote(self, lote):
+        ...
+
+    # Avisa en segundo plano los cambios posteriores a la marca llamando a al_cambiar(cambiados, eliminados).
+    # Devuelve los listeners activos, o None si el motor no sabe avisar cambios.
+    def escuchar(self, marca, al_cambiar):
+        return None
+
+
+class RepositorioFirestore(Repositorio):
+    # particiones > 1: la carga completa lee la colección en paralelo (datos.cargar_en_paralelo)
+    def __init__(self, db, particiones=1):
+        self.db = db
+        self.particiones = particiones
+
+    def verificar_credenciales(self, usuario, password):
+        consulta = self.db.collection("usuarios").where("usuario", "==", usuario).where("password", "==", password)
+        return any(consulta.limit(1).stream())
+
+    def cargar_movimientos(self, columnas=None):
+        return datos.cargar_datos(self.db, columnas, self.particiones, self.usuario)
+
+    def cargar_cambios(self, marca):
+        return datos.cargar_cambios(self.db, marca, self.usuario)
+
+    def cargar_filtrado(self, tipos=None, categoria=None, mes=None, columnas=None):
+        return datos.cargar_filtrado(self.db, tipos, categoria, mes, columnas, self.usuario)
+
+    def meses_disponibles(self):
+        return datos.meses_disponibles(self.db, self.usuario)
+
+    def cargar_resumen(self, tipos=None, categoria=None, columnas=None, desde=None, hasta=None):
+        from resumenes import cargar_resumen
+
+        return cargar_resumen(self.db, tipos, categoria, columnas, desde, hasta, self.usuario)
+
+    def nuevo_id(self):
+        return datos.nuevo_id(self.db)
+
+    def agregar(self, registro, doc_id=None):
+        return datos.agregar_movimiento(self.db, registro, doc_id)
+
+    def actualizar(self, doc_id, cambios):
+        datos.actualizar_movimiento(self.db, doc_id, cambios)
+
+    def eliminar(self, doc_id):
+        datos.eliminar_movimiento(self.db, doc_id)
+
+    def escribir_lote(self, lote):
+        return datos.escribir_lote(self.db, lote)
+
+    def actualizar_lote(self, lote):
+        datos.actualizar_lote(self.db, lote)
+
+    def escuchar(self, marca, al_cambiar):
+        return datos.escuchar_cambios(self.db, marca, al_cambiar, self.usuario)
+
+
+# Filtra en pandas con el mismo criterio que las consultas a Firebase
+def _filtrar(df, tipos=None, categoria=None, mes=None, desde=None, hasta=None):
+    filtro = pd.Series(True, index=df.index)
+    if tipos:
+        filtro &= df["Tipo"].isin(list(tipos))
+    if categoria:
+        filtro &= df["Categoría"] == categoria
+    if mes:
+        desde, hasta = datos.rango_mes(mes)
+    if desde is not None:
+        filtro &= df["Fecha_Real"] >= desde
+    if hasta is not None:
+        filtro &= df["Fecha_Real"] < hasta
+    return df[filtro].reset_index(drop=True)
+
+
+def _proyectar(df, columnas=None):
+    return df if columnas is None else df[list(columnas) + ["id"]]
+
+
+# Todo en memoria del proceso: para pruebas, benchmarks y usar la app sin conexión
+class RepositorioMemoria(Repositorio):
+    def __init__(self, usuarios=None, movimientos=None):
+        self.usuarios = dict(usuarios or {})
+        self._movimientos = dict(movimientos or {})
+        self._eliminados = {}  # id: (fecha, usuario) de cada movimiento eliminado
+        self._lock = threading.Lock()
+
+    def verificar_credenciales(self, usuario, password):
+        return usuario in self.usuarios and self.usuarios[usuario] == password
+
+    def cargar_movimientos(self, columnas=None):
+        with self._lock:
+            filas = [(doc_id, registro) for doc_id, registro in self._movimientos.items()
+                     if self.usuario is None or registro.get("Usuario") == self.usuario]
+        return datos._dataframe_desde_filas(filas, columnas)
+
+    def cargar_cambios(self, marca):
+        desde = marca - MARGEN_SINCRONIZACION
+        df = self.cargar_movimientos()
+        cambiados = df[(df["Fecha_Registro"] > desde) | (df["Fecha_Actualizacion"] > desde)].reset_index(drop=True)
+        with self._lock:
+            eliminados = {
+                doc_id: fecha for doc_id, (fecha, usuario) in self._eliminados.items()
+                if fecha > desde and (self.usuario is None or usuario == self.usuario)
+            }
+        return cambiados, eliminados
+
+    def cargar_filtrado(self, tipos=None, categoria=None, mes=None, columnas=None):
+        return _proyectar(_filtrar(self.cargar_movimientos(), tipos, categoria, mes), columnas)
+
+    def meses_disponibles(self):
+        fechas = self.cargar_movimientos(["Fecha_Real"])["Fecha_Real"].dropna()
+        return datos.meses_entre(fechas.min(), fechas.max()) if not fechas.empty else []
+
+    def cargar_resumen(self, tipos=None, categoria=None, columnas=None, desde=None, hasta=None):
+        resumen = calcular_resumen(_filtrar(self.cargar_movimientos(), tipos, categoria, desde=desde, hasta=hasta))
+        return resumen[columnas_resumen(columnas)]
+
+    def agregar(self, registro, doc_id=None):
+        doc_id = doc_id or self.nuevo_id()
+        with self._lock:
+            self._movimientos[doc_id] = dict(registro)
+        return doc_id
+
+    def actualizar(self, doc_id, cambios):
+        with self._lock:
+            self._movimientos[doc_id] = {**self._movimientos[doc_id], **cambios}
+
+    def eliminar(self, doc_id):
+        with self._lock:
+            anterior = self._movimientos.pop(doc_id, None)
+            self._eliminados[doc_id] = (datetime.now(), anterior.get("Usuario") if anterior else None)
+
+    def escribir_lote(self, lote):
+        with self._lock:
+            if lote[0][0] in self._movimientos:
+                return False
+            for doc_id, registro in lote:
+                self._movimientos[doc_id] = dict(registro)
+        return True
+
+    def actualizar_lote(self, lote):
+        with self._lock:
+            for doc_id, _, cambios in lote:
+                self._movimientos[doc_id] = {**self._movimientos[doc_id], **cambios}
+
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS movimientos (
+    id TEXT PRIMARY KEY,
+    Fecha TEXT, Fecha_Registro TEXT, Fecha_Real TEXT, Fecha_Actualizacion TEXT,
+    Tipo TEXT, "Categoría" TEXT, Detalle TEXT, Subdetalle TEXT, "Forma de pago" TEXT,
+    Monto REAL, Comentario TEXT, Usuario TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_movimientos_fecha_real ON movimientos (Fecha_Real);
+CREATE INDEX IF NOT EXISTS idx_movimientos_tipo ON movimientos (Tipo, "Categoría", Fecha_Real);
+CREATE INDEX IF NOT EXISTS idx_movimientos_categoria ON movimientos ("Categoría", Fecha_Real);
+CREATE INDEX IF NOT EXISTS idx_movimientos_registro ON movimientos (Fecha_Registro);
+CREATE INDEX IF NOT EXISTS idx_movimientos_actualizacion ON movimientos (Fecha_Actualizacion);
+CREATE INDEX IF NOT EXISTS idx_movimientos_usuario ON movimientos (Usuario, Fecha_Real);
+CREATE TABLE IF NOT EXISTS movimientos_eliminados (id TEXT PRIMARY KEY, Fecha_Eliminacion TEXT, Usuario TEXT);
+CREATE INDEX IF NOT EXISTS idx_eliminados_fecha ON movimientos_eliminados (Fecha_Eliminacion);
+CREATE TABLE IF NOT EXISTS usuarios (usuario TEXT PRIMARY KEY, password TEXT);
+"""
+
+def _columnas_sql(columnas):
+    return ", ".join(f'"{c}"' for c in ["id"] + columnas)
+
+
+COLUMNAS_SQL = _columnas_sql(COLUMNAS)
+
+
+# Las fechas se guardan como texto ISO de ancho fijo para que se comparen y ordenen bien en SQL
+def _a_sql(valor):
+    if valor is None or (not isinstance(valor, str) and pd.isnull(valor)):
+        return None
+    if isinstance(valor, (datetime, pd.Timestamp)):
+        return pd.Timestamp(valor).tz_localize(None).strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(valor, date):
+        return valor.strftime("%Y-%m-%d 00:00:00.000000")
+    return valor
+
+
+def _filtros_sql(tipos=None, categoria=None, mes=None, desde=None, hasta=None, usuario=None):
+    condiciones, parametros = [], []
+    if usuario is not None:
+        condiciones.append("Usuario = ?")
+        parametros.append(usuario)
+    if tipos:
+        tipos = list(tipos)
+        condiciones.append(f"Tipo IN ({', '.join('?' * len(tipos))})")
+        parametros += tipos
+    if categoria:
+        condiciones.append('"Categoría" = ?')
+        parametros.append(categoria)
+    if mes:
+        desde, hasta = datos.rango_mes(mes)
+    if desde is not None:
+        condiciones.append("Fecha_Real >= ?")
+        parametros.append(_a_sql(desde))
+    if hasta is not None:
+        condiciones.append("Fecha_Real < ?")
+        parametros.append(_a_sql(hasta))
+    return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+
+# Base local en un archivo SQLite. Los filtros y los totales del tablero se resuelven en SQL con índices.
+class RepositorioSQLite(Repositorio):
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with self._conectar() as conexion:
+            conexion.executescript(ESQUEMA_SQLITE)
+            # Bases creadas antes de guardar el usuario en las lápidas
+            if "Usuario" not in [fila[1] for fila in conexion.execute("PRAGMA table_info(movimientos_eliminados)")]:
+                conexion.execute("ALTER TABLE movimientos_eliminados ADD COLUMN Usuario TEXT")
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_eliminados_usuario ON movimientos_eliminados (Usuario, Fecha_Eliminacion)")
+
+    # Una conexión por operación: sqlite3 no comparte conexiones entre hilos de Streamlit
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def _leer(self, where="", parametros=(), columnas=None):
+        columnas = COLUMNAS if columnas is None else list(columnas)
+        with self._conectar() as conexion:
+            df = pd.read_sql_query(f"SELECT {_columnas_sql(columnas)} FROM movimientos{where}", conexion, params=list(parametros))
+        for campo in CAMPOS_FECHA:
+            if campo in df:
+                df[campo] = pd.to_datetime(df[campo], format="ISO8601", errors="coerce")
+        return tipar(df[columnas + ["id"]])
+
+    def verificar_credenciales(self, usuario, password):
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT 1 FROM usuarios WHERE usuario = ? AND password = ?", (usuario, password)
+            ).fetchone()
+        return fila is not None
+
+    def agregar_usuario(self, usuario, password):
+        with self._conectar() as conexion:
+            conexion.execute("INSERT OR REPLACE INTO usuarios VALUES (?, ?)", (usuario, password))
+
+    def cargar_movimientos(self, columnas=None):
+        return self._leer(*_filtros_sql(usuario=self.usuario), columnas)
+
+    def cargar_cambios(self, marca):
+        desde = _a_sql(marca - MARGEN_SINCRONIZACION)
+        where, parametros = _filtros_sql(usuario=self.usuario)
+        where = (where + " AND" if where else " WHERE") + " (Fecha_Registro > ? OR Fecha_Actualizacion > ?)"
+        cambiados = self._leer(where, parametros + [desde, desde])
+        where, parametros = _filtros_sql(usuario=self.usuario)
+        where = (where + " AND" if where else " WHERE") + " Fecha_Eliminacion > ?"
+        with self._conectar() as conexion:
+            filas = conexion.execute(
+                f"SELECT id, Fecha_Eliminacion FROM movimientos_eliminados{where}", parametros + [desde]
+            ).fetchall()
+        return cambiados, {doc_id: datetime.fromisoformat(fecha) for doc_id, fecha in filas}
+
+    def cargar_filtrado(self, tipos=None, categoria=None, mes=None, columnas=None):
+        return self._leer(*_filtros_sql(tipos, categoria, mes, usuario=self.usuario), columnas)
+
+    def meses_disponibles(self):
+        where, parametros = _filtros_sql(usuario=self.usuario)
+        with self._conectar() as conexion:
+            inicio, fin = conexion.execute(f"SELECT MIN(Fecha_Real), MAX(Fecha_Real) FROM movimientos{where}", parametros).fetchone()
+        return datos.meses_entre(inicio, fin) if inicio else []
+
+    # Sumas mensuales por Tipo, Categoría y Detalle con un GROUP BY sobre los índices
+    def cargar_resumen(self, tipos=None, categoria=None, columnas=None, desde=None, hasta=None):
+        where, parametros = _filtros_sql(tipos, categoria, desde=desde, hasta=hasta, usuario=self.usuario)
+        where = (where + " AND" if where else " WHERE") + " Fecha_Real IS NOT NULL"
+        consulta = f"""
+            SELECT COALESCE(Usuario, '-') AS Usuario, substr(Fecha_Real, 1, 7) AS Mes,
+                   COALESCE(Tipo, '-') AS Tipo, COALESCE("Categoría", '-') AS "Categoría",
+                   COALESCE(Detalle, '-') AS Detalle,
+                   SUM(CAST(ROUND(COALESCE(Monto, 0) * 100) AS INTEGER)) / 100.0 AS Monto, COUNT(*) AS Cantidad
+            FROM movimientos{where}
+            GROUP BY 1, 2, 3, 4, 5
+        """
+        with self._conectar() as conexion:
+            df = pd.read_sql_query(consulta, conexion, params=parametros)
+        df["Fecha_Real"] = pd.to_datetime(df["Mes"], format="%Y-%m")
+        return df[columnas_resumen(columnas)]
+
+    def _insertar(self, conexion, filas):
+        marcas = ", ".join("?" * (len(COLUMNAS) + 1))
+        conexion.executemany(
+            f"INSERT INTO movimientos ({COLUMNAS_SQL}) VALUES ({marcas})",
+            [[doc_id] + [_a_sql(registro.get(c)) for c in COLUMNAS] for doc_id, registro in filas]
+        )
+
+    def agregar(self, registro, doc_id=None):
+        doc_id = doc_id or self.nuevo_id()
+        with self._conectar() as conexion:
+            self._insertar(conexion, [(doc_id, registro)])
+        return doc_id
+
+    def _modificar(self, conexion, doc_id, cambios):
+        campos = [c for c in cambios if c in COLUMNAS]
+        asignaciones = ", ".join(f'"{c}" = ?' for c in campos)
+        conexion.execute(
+            f"UPDATE movimientos SET {asignaciones} WHERE id = ?",
+            [_a_sql(cambios[c]) for c in campos] + [doc_id]
+        )
+
+    def actualizar(self, doc_id, cambios):
+        with self._conectar() as conexion:
+            self._modificar(conexion, doc_id, cambios)
+
+    def eliminar(self, doc_id):
+        with self._conectar() as conexion:
+            fila = conexion.execute("SELECT Usuario FROM movimientos WHERE id = ?", (doc_id,)).fetchone()
+            conexion.execute("DELETE FROM movimientos WHERE id = ?", (doc_id,))
+            conexion.execute(
+                "INSERT OR REPLACE INTO movimientos_eliminados (id, Fecha_Eliminacion, Usuario) VALUES (?, ?, ?)",
+                (doc_id, _a_sql(datetime.now()), fila[0] if fila else None)
+            )
+
+    def escribir_lote(self, lote):
+        with self._conectar() as conexion:
+            if conexion.execute("SELECT 1 FROM movimientos WHERE id = ?", (lote[0][0],)).fetchone():
+                return False
+            self._insertar(conexion, lote)
+        return True
+
+    def actualizar_lote(self, lote):
+        with self._conectar() as conexion:
+            for doc_id, _, cambios in lote:
+                self._modificar(conexion, doc_id, cambios)
+
+
+# Elige el motor según la configuración (st.secrets o un dict): BACKEND = firestore | sqlite | memoria.
+# Con Firebase, PARTICIONES_CARGA es en cuántas partes se lee la colección al cargar todo (1 = sin paralelo).
+def crear_repositorio(config):
+    backend = config.get("BACKEND", "firestore")
+    if backend == "firestore":
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(json.loads(config["FIREBASE_CREDENTIALS"])))
+        return RepositorioFirestore(firestore.client(), particiones=int(config.get("PARTICIONES_CARGA", 4)))
+    if backend == "sqlite":
+        return RepositorioSQLite(config.get("RUTA_SQLITE", "finanzas.db"))
+    if backend == "memoria":
+        return RepositorioMemoria(usuarios=config.get("USUARIOS", {}))
+    raise ValueError(f"BACKEND desconocido: {backend}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepara una base SQLite local para usar la app sin Firebase")
+    parser.add_argument("ruta", help="Archivo SQLite (se crea si no existe)")
+    parser.add_argument("--copiar-de", metavar="CREDENCIALES", help="Copia los movimientos desde Firebase")
+    parser.add_argument("--usuario")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    repositorio = RepositorioSQLite(args.ruta)
+    if args.usuario:
+        repositorio.agregar_usuario(args.usuario, args.password or "")
+        print(f"Usuario {args.usuario} guardado")
+    if args.copiar_de:
+        df = datos.cargar_datos(datos.conectar_firestore(args.copiar_de))
+        registros = list(zip(df["id"], datos.convertir_df_firebase(sin_tipos(df[COLUMNAS]))))
+        if registros and repositorio.escribir_lote(registros):
+            print(f"{len(registros)} movimientos copiados")
+        else:
+            print("No hay movimientos nuevos para copiar")
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.io as pio
+
+import agregaciones
+import graficos
+from almacenamiento import RepositorioMemoria, RepositorioSQLite
+from catalogos import formas_pago, combinaciones_validas
+from datos import convertir_df_firebase
+from instantanea import guardar_instantanea, leer_instantanea
+from transformaciones import agregar_columnas_mes, calcular_fecha_real
+
+TAMANOS = [10_000, 100_000, 1_000_000]
+
+# Mismo tema que la app: la serialización de las figuras depende de él
+pio.templates.default = "plotly_dark"
+
+
+# Movimientos sintéticos con la taxonomía real del formulario. Con la misma semilla siempre salen los mismos.
+def generar_movimientos(filas, semilla=0, meses=36, usuarios=("ana", "luis")):
+    rng = np.random.default_rng(semilla)
+    combinaciones = np.array(combinaciones_validas(), dtype=object)
+    ingresos = combinaciones[combinaciones[:, 0] == "Ingreso"]
+    egresos = combinaciones[combinaciones[:, 0] == "Egreso"]
+
+    # Cuatro egresos por cada ingreso, como en el uso normal
+    es_ingreso = rng.random(filas) < 0.2
+    elegidas = np.where(
+        es_ingreso[:, None],
+        ingresos[rng.integers(0, len(ingresos), size=filas)],
+        egresos[rng.integers(0, len(egresos), size=filas)],
+    )
+    df = pd.DataFrame(elegidas, columns=["Tipo", "Categoría", "Detalle", "Subdetalle"])
+
+    inicio = pd.Timestamp("2022-01-01")
+    fecha = inicio + pd.to_timedelta(rng.integers(0, meses * 30, size=filas), unit="D")
+    df["Fecha"] = fecha
+    df["Fecha_Real"] = calcular_fecha_real(df["Fecha"], df["Tipo"])
+    df["Fecha_Registro"] = fecha + pd.to_timedelta(rng.integers(0, 72 * 3600, size=filas), unit="s")
+    actualizados = rng.random(filas) < 0.05
+    df["Fecha_Actualizacion"] = (df["Fecha_Registro"] + pd.Timedelta(days=1)).where(actualizados)
+    df["Forma de pago"] = np.array(formas_pago)[rng.integers(0, len(formas_pago), size=filas)]
+    monto = np.where(es_ingreso, rng.lognormal(7, 0.5, size=filas), rng.lognormal(3.5, 1, size=filas))
+    df["Monto"] = np.round(monto, 2)
+    df["Comentario"] = np.where(rng.random(filas) < 0.3, "compra", "")
+    df["Usuario"] = np.array(usuarios)[rng.integers(0, len(usuarios), size=filas)]
+
+    ids = [f"sint_{i:07d}" for i in range(filas)]
+    return list(zip(ids, convertir_df_firebase(df)))
+
+
+def crear_repositorio_benchmark(backend, registros, carpeta):
+    if backend == "memoria":
+        return RepositorioMemoria(movimientos=dict(registros))
+    repositorio = RepositorioSQLite(os.path.join(carpeta, f"benchmark_{len(registros)}.db"))
+    repositorio.escribir_lote(registros)
+    return repositorio
+
+
+class Medidor:
+    def __init__(self, repeticiones):
+        self.repeticiones = repeticiones
+        self.resultados = []
+
+    # Ejecuta la función varias veces y guarda el mínimo y la mediana; devuelve el último resultado
+    def medir(self, filas, paso, funcion):
+        tiempos = []
+        for _ in range(self.repeticiones):
+            inicio = time.perf_counter()
+            valor = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        self.resultados.append({
+            "filas": filas,
+            "paso": paso,
+            "min_s": round(min(tiempos), 6),
+            "mediana_s": round(statistics.median(tiempos), 6),
+        })
+        print(f"  {paso:<32} {min(tiempos) * 1000:10.1f} ms")
+        return valor
+
+
+# Mide los pasos de la app para un tamaño de datos
+def medir_tamano(medidor, filas, backend, carpeta, semilla):
+    registros = generar_movimientos(filas, semilla)
+    repositorio = crear_repositorio_benchmark(backend, registros, carpeta)
+    del registros
+    medir = lambda paso, funcion: medidor.medir(filas, paso, funcion)
+
+    df = medir("cargar_datos", repositorio.cargar_movimientos)
+    ruta = os.path.join(carpeta, f"instantanea_{filas}.parquet")
+    medir("instantanea_guardar", lambda: guardar_instantanea(df, datetime.now(), ruta))
+    medir("instantanea_leer", lambda: leer_instantanea(ruta))
+    medir("mes_label", lambda: agregar_columnas_mes(df))
+
+    # Filtros de "Formulario y Movimientos"
+    medir("filtrado_tipo", lambda: repositorio.cargar_filtrado(("Egreso",)))
+    medir("filtrado_categoria_mes", lambda: repositorio.cargar_filtrado(None, "Vivienda", "2023-06"))
+    medir("filtrado_tipo_categoria_mes", lambda: repositorio.cargar_filtrado(("Ingreso",), "Servicios", "2023-06"))
+
+    # "Visualización": resumen, cubo y cada corte
+    resumen = medir("resumen", repositorio.cargar_resumen)
+    resumen = medir("resumen_mes_label", lambda: agregar_columnas_mes(resumen))
+    tipos = ["Ingreso", "Egreso", "Ahorros"]
+    meses = list(resumen["Mes"].cat.categories)
+    cubo = medir("cubo", lambda: agregaciones.construir_cubo(resumen, tipos))
+    medir("totales", lambda: agregaciones.totales(cubo, meses, tipos))
+    cortes = {
+        "evolutivo": (lambda: agregaciones.por_mes_tipo(cubo), graficos.figura_evolutivo),
+        "categorias": (lambda: agregaciones.por_categoria(cubo, meses), graficos.figura_categorias),
+        "variacion_mensual": (lambda: agregaciones.variacion_mensual(cubo), graficos.figura_variacion_mensual),
+        "variacion_categoria": (lambda: agregaciones.variacion_por_categoria(cubo, meses), graficos.figura_variacion_categoria),
+        "vivienda": (lambda: agregaciones.por_detalle(cubo, meses, "Vivienda"), graficos.figura_vivienda),
+        "servicios": (lambda: agregaciones.por_detalle(cubo, meses, "Servicios"), graficos.figura_servicios),
+    }
+    for nombre, (cortar, figura) in cortes.items():
+        datos_corte = medir(f"corte_{nombre}", cortar)
+        fig = medir(f"figura_{nombre}", lambda: figura(datos_corte.copy()))
+        medir(f"figura_{nombre}_json", fig.to_json)
+
+
+def _version_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Muestra cuánto cambió cada paso respecto de otra corrida (>1 es más lento)
+def comparar(actual, ruta_anterior):
+    with open(ruta_anterior, encoding="utf-8") as f:
+        anterior = {(r["filas"], r["paso"]): r for r in json.load(f)["resultados"]}
+    print(f"\nComparado con {ruta_anterior}:")
+    for r in actual:
+        previo = anterior.get((r["filas"], r["paso"]))
+        if previo and previo["min_s"] > 0:
+            print(f"  {r['filas']:>9} {r['paso']:<32} x{r['min_s'] / previo['min_s']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide carga, transformaciones, agregaciones y figuras con datos sintéticos")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS)
+    parser.add_argument("--backend", choices=["memoria", "sqlite"], default="memoria")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="benchmark.json")
+    parser.add_argument("--comparar", metavar="JSON", help="Resultado anterior para comparar")
+    args = parser.parse_args()
+
+    medidor = Medidor(args.repeticiones)
+    with tempfile.TemporaryDirectory() as carpeta:
+        for filas in args.tamanos:
+            print(f"{filas} filas ({args.backend})")
+            medir_tamano(medidor, filas, args.backend, carpeta, args.semilla)
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": _version_codigo(),
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "backend": args.backend,
+            "repeticiones": args.repeticiones,
+            "semilla": args.semilla,
+            "entorno": {
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "plotly": plotly.__version__,
+            },
+            "resultados": medidor.resultados,
+        }, f, indent=2)
+    print(f"Resultados en {args.salida}")
+    if args.comparar:
+        comparar(medidor.resultados, args.comparar)
@@ -0,0 +1,131 @@
+import itertools
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Columnas de datos de una traza de Plotly que pesan; el resto de la figura se cuenta con un fijo
+CAMPOS_TRAZA = ("x", "y", "z", "values", "labels", "parents", "ids", "text", "customdata")
+BYTES_FIGURA = 16 * 1024
+
+
+# Estima la memoria que ocupa un valor guardado en la cache
+def medir_tamano(valor):
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, (tuple, list)):
+        return sum(medir_tamano(v) for v in valor)
+    # Figuras de Plotly: los arreglos de cada traza más un fijo por el layout. Serializarla a JSON
+    # para medirla costaría casi lo mismo que armarla.
+    if hasattr(valor, "to_plotly_json"):
+        tamano = BYTES_FIGURA
+        for traza in valor.data:
+            for campo in CAMPOS_TRAZA:
+                datos = getattr(traza, campo, None)
+                if datos is not None:
+                    tamano += np.asarray(datos).nbytes
+        return tamano
+    return sys.getsizeof(valor)
+
+
+class _Entrada:
+    def __init__(self, valor, tamano, version):
+        self.valor = valor
+        self.tamano = tamano
+        self.version = version
+        self.creada = time.monotonic()
+
+
+# Cache compartida por todas las sesiones del proceso, con TTL y límite de memoria.
+# Los valores guardados no deben modificarse: quien necesite cambiarlos trabaja sobre una copia.
+class CacheCompartida:
+    def __init__(self, ttl=300, max_bytes=512 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._versiones = {}
+        self._contador = itertools.count(1)
+        self._lock = threading.RLock()
+        # Los locks de carga se descartan solos cuando ninguna sesión los está usando
+        self._locks_carga = weakref.WeakValueDictionary()
+
+    def _lock_de(self, clave):
+        with self._lock:
+            return self._locks_carga.setdefault(clave, threading.Lock())
+
+    def _vigente(self, entrada):
+        return entrada is not None and time.monotonic() - entrada.creada < self.ttl
+
+    # Quita una entrada junto con su versión (llamar con self._lock tomado)
+    def _quitar(self, clave):
+        self._entradas.pop(clave, None)
+        self._versiones.pop(clave, None)
+
+    # Las versiones salen de un contador común: una clave que se quita y vuelve a cargarse
+    # nunca repite un número anterior
+    def _guardar(self, clave, valor):
+        tamano = medir_tamano(valor)
+        with self._lock:
+            self._entradas.pop(clave, None)
+            version = next(self._contador)
+            self._versiones[clave] = version
+            if tamano > self.max_bytes:
+                print(f"Cache: '{clave}' ocupa {tamano} bytes y supera el límite, no se guarda")
+                return
+            self._entradas[clave] = _Entrada(valor, tamano, version)
+            # Desaloja las entradas menos usadas hasta respetar el límite de memoria
+            while sum(e.tamano for e in self._entradas.values()) > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+
+    # Devuelve el valor de la clave; si no está lo carga, si venció lo refresca
+    def obtener(self, clave, cargar, refrescar=None):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if self._vigente(entrada):
+                self._entradas.move_to_end(clave)
+                return entrada.valor
+
+        # Una sola sesión carga la clave; las demás esperan y reutilizan el resultado
+        with self._lock_de(clave):
+            with self._lock:
+                entrada = self._entradas.get(clave)
+            if self._vigente(entrada):
+                return entrada.valor
+            if entrada is not None and refrescar is not None:
+                valor = refrescar(entrada.valor)
+            else:
+                valor = cargar()
+            self._guardar(clave, valor)
+            return valor
+
+    # Aplica un cambio sobre el valor guardado (si existe) sin volver a cargarlo
+    def actualizar(self, clave, funcion):
+        with self._lock_de(clave):
+            with self._lock:
+                entrada = self._entradas.get(clave)
+            if entrada is None:
+                return
+            self._guardar(clave, funcion(entrada.valor))
+
+    def invalidar(self, clave=None):
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+                self._versiones.clear()
+            else:
+                self._quitar(clave)
+
+    # Invalida las claves tipo tupla que empiezan con el prefijo dado (uno o más elementos)
+    def invalidar_prefijo(self, *prefijo):
+        with self._lock:
+            for clave in [c for c in self._entradas if isinstance(c, tuple) and c[:len(prefijo)] == prefijo]:
+                self._quitar(clave)
+
+    # Número que cambia cada vez que se guarda un valor nuevo para la clave
+    def version(self, clave):
+        with self._lock:
+            return self._versiones.get(clave, 0)
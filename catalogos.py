@@ -0,0 +1,40 @@
+# Formas de pago
+formas_pago = ["INTERBANK", "BCP", "YAPE", "PLIN", "EFECTIVO", "BBVA"]
+
+# Ingresos
+ingresos = {
+    "Vivienda": {"Cuota Banco": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Mantenimiento": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Luz": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Internet": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Calidda": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Amortización": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"]},
+    "Aseo (Limpieza)": {"Sueldo": [], "Emprendimiento": [], "Bono": [], "Negocio": [], "Agora": [], "Paypal": [], "Préstamo": []},
+    "Alimentos": {"Sueldo": [], "Emprendimiento": [], "Bono": [], "Negocio": [], "Agora": [], "Paypal": [], "Préstamo": []},
+    "Servicios": {"Taxi": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Educación": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Medicina": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"], "Cita Médica": ["Sueldo", "Emprendimiento", "Agora", "Paypal", "Prestamo"]},
+    "Entretenimiento": {"Sueldo": [], "Emprendimiento": [], "Bono": [], "Negocio": [], "Agora": [], "Paypal": [], "Préstamo": []},
+    "Otros": {"Sueldo": [], "Emprendimiento": [], "Bono": [], "Negocio": [], "Agora": [], "Paypal": [], "Préstamo": []},
+    "Ahorros": {"Sueldo": [], "Emprendimiento": [], "Bono": [], "Negocio": [], "Agora": [], "Paypal": [], "Préstamo": []},
+    "Manuntención": {"Sueldo": [], "Emprendimiento": [], "Bono": [], "Negocio": [], "Agora": [], "Paypal": [], "Préstamo": []}
+}
+
+# Egresos
+egresos = {
+    "Vivienda": {"Cuota Banco": [], "Mantenimiento": [], "Luz": [], "Internet": [], "Calidda": [], "Amortización": [], "Objetos": []},
+    "Aseo (Limpieza)": {"Detergente": [], "Jabón": [], "Aromatizantes": [], "PrestoBarba": [], "Shampoo": [], "Objetos": []},
+    "Alimentos": {"Carne": [], "Pollo": [], "Frutas": [], "Verduras": [], "Lácteos": [], "Especería": [], "Abarrotes": [], "Cereales": [], "Panadería": [], "Menú": [], "Restaurante": []},
+    "Servicios": {"Taxi": [], "Educación": ["Matrícula", "Libros", "Mensualidad", "Materiales", "Uniforme"], "Medicina": [], "Cita Médica": []},
+    "Entretenimiento": {"Viajes": [], "Suscripciones": ["DisneyPlus", "Netflix", "Paramount"]},
+    "Otros": {"Regalos": [], "Emergencias": [], "Bebidas": [], "Snacks": []},
+    "Ahorros": {"Ahorro General": []},
+    "Manuntención": {"Taxi": [], "Educación": ["Matrícula", "Libros", "Mensualidad", "Materiales", "Uniforme"], "Medicina": [], "Cita Médica": [], "Regalos": [], "Juegos": [], "Vestimenta": [], "Dulces": [], "Pasajes": []}
+}
+
+# Combinaciones válidas (Tipo, Categoría, Detalle, Subdetalle), igual que las arma el formulario
+def combinaciones_validas():
+    filas = []
+    for categoria, tipos in ingresos.items():
+        for tipo_ingreso, detalles in tipos.items():
+            if categoria in ["Vivienda", "Servicios"]:
+                filas += [("Ingreso", categoria, tipo_ingreso, d) for d in detalles or ["-"]]
+            else:
+                filas.append(("Ingreso", categoria, "-", tipo_ingreso))
+    for categoria, tipos in egresos.items():
+        for tipo_egreso, detalles in tipos.items():
+            filas += [("Egreso", categoria, tipo_egreso, d) for d in detalles or ["-"]]
+    return filas
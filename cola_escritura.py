@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from google.api_core import exceptions
+
+from datos import CAMPOS_FECHA, dividir_en_lotes
+
+ESQUEMA_COLA = """
+CREATE TABLE IF NOT EXISTS cola (
+    orden INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    registro TEXT NOT NULL,
+    lote INTEGER,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    confirmado TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS cola_estado ON cola (estado, lote);
+"""
+
+# Cuántos pendientes se miran al armar un lote; dividir_en_lotes lo recorta a 500 escrituras
+MAXIMO_LOTE = 200
+
+# Los confirmados se guardan un día para mostrar su estado y luego se borran. Los que fallaron
+# (estado 'error') se conservan: su registro es lo único que queda de ese movimiento.
+RETENCION_CONFIRMADOS = timedelta(days=1)
+
+
+# Errores que no se arreglan reintentando: datos inválidos, permisos, índices o reglas (los 4xx de
+# Google, salvo contención, cuota o cancelación, que sí se reintentan). Lo demás, como
+# ServiceUnavailable, DeadlineExceeded o RetryError, se reintenta con espera creciente.
+def es_error_permanente(error):
+    if isinstance(error, exceptions.ClientError):
+        return not isinstance(error, (exceptions.Aborted, exceptions.TooManyRequests, exceptions.Cancelled))
+    return isinstance(error, (ValueError, TypeError, sqlite3.IntegrityError))
+
+
+def _a_json(registro):
+    return json.dumps({c: v.isoformat() if isinstance(v, datetime) else v for c, v in registro.items()})
+
+
+def _desde_json(texto):
+    registro = json.loads(texto)
+    for campo in CAMPOS_FECHA:
+        if registro.get(campo):
+            registro[campo] = datetime.fromisoformat(registro[campo])
+    return registro
+
+
+# Cola local de movimientos nuevos por escribir en el almacenamiento. encolar() solo guarda en un
+# SQLite en disco y vuelve enseguida; un hilo en segundo plano junta lo pendiente en lotes y los
+# escribe con escribir_lote, reintentando con espera creciente si falla. Lo encolado sobrevive a
+# un reinicio del proceso: al iniciar se retoman los pendientes. al_confirmar(lote) recibe los
+# (id, registro) de cada lote confirmado y al_fallar(lote) los de cada lote que no se podrá escribir.
+#
+# Un error permanente no frena la cola: el lote se parte en lotes de un movimiento para aislar
+# al que falla, y ese queda en estado 'error' con el mensaje. Los demás siguen su curso.
+#
+# Un lote se arma una sola vez y queda guardado: si se corta o falla, se reintenta el mismo lote
+# en el mismo orden. Así la comprobación de escribir_lote (¿ya existe el primer id?) basta para
+# no escribir dos veces ni sumar dos veces al resumen.
+#
+# Al enviar, Fecha_Registro pasa a ser la hora del envío y no la del formulario: la sincronización
+# por deltas (y el listener) solo mira MARGEN_SINCRONIZACION antes de la marca, y un movimiento que
+# esperó más en la cola (reintentos, sin conexión, reinicio) no les llegaría a los demás procesos.
+class ColaEscritura:
+    def __init__(self, repositorio, ruta, al_confirmar=None, al_fallar=None, espera=0.5, espera_maxima=60):
+        self.repositorio = repositorio
+        self.ruta = ruta
+        self.al_confirmar = al_confirmar
+        self.al_fallar = al_fallar
+        self.espera = espera
+        self.espera_maxima = espera_maxima
+        self.ultimo_error = None
+        self._aviso = threading.Event()
+        self._hilo = None
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.executescript(ESQUEMA_COLA)
+            # Colas creadas antes de guardar el error de los lotes que fallan
+            if "error" not in [fila[1] for fila in conexion.execute("PRAGMA table_info(cola)")]:
+                conexion.execute("ALTER TABLE cola ADD COLUMN error TEXT")
+            limite = (datetime.now() - RETENCION_CONFIRMADOS).isoformat()
+            conexion.execute("DELETE FROM cola WHERE estado = 'confirmado' AND confirmado < ?", (limite,))
+
+    # Una conexión por operación, como en RepositorioSQLite: la usan el hilo de la cola y los de Streamlit
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._trabajar, name="cola-escritura", daemon=True)
+            self._hilo.start()
+            if self.pendientes():
+                self._aviso.set()
+        return self
+
+    # Deja el movimiento en la cola y despierta al hilo; devuelve el id
+    def encolar(self, doc_id, registro):
+        with self._conectar() as conexion:
+            conexion.execute("INSERT INTO cola (id, registro) VALUES (?, ?)", (doc_id, _a_json(registro)))
+        self._aviso.set()
+        return doc_id
+
+    def pendientes(self):
+        with self._conectar() as conexion:
+            return conexion.execute("SELECT COUNT(*) FROM cola WHERE estado = 'pendiente'").fetchone()[0]
+
+    def pendiente(self, doc_id):
+        return self.estados([doc_id]).get(doc_id, (None, None, None))[0] == "pendiente"
+
+    # Estado de cada id ("pendiente", "confirmado" o "error") con su registro y el mensaje de error;
+    # los que no están en la cola no aparecen
+    def estados(self, ids):
+        ids = list(ids)
+        if not ids:
+            return {}
+        marcas = ", ".join("?" * len(ids))
+        with self._conectar() as conexion:
+            filas = conexion.execute(f"SELECT id, estado, registro, error FROM cola WHERE id IN ({marcas})", ids).fetchall()
+        return {doc_id: (estado, _desde_json(registro), error) for doc_id, estado, registro, error in filas}
+
+    # Espera un momento tras el primer aviso para juntar en el mismo lote lo que llegue mientras tanto
+    def _trabajar(self):
+        fallos = 0
+        while True:
+            self._aviso.wait()
+            time.sleep(self.espera)
+            self._aviso.clear()
+            try:
+                while self._enviar_lote():
+                    pass
+                fallos = 0
+                self.ultimo_error = None
+            except Exception as e:
+                fallos += 1
+                pausa = min(self.espera_maxima, self.espera * 2 ** fallos)
+                self.ultimo_error = str(e)
+                print(f"Cola de escritura: no se pudo escribir el lote ({e}), reintento en {pausa:.1f} s")
+                time.sleep(pausa)
+                self._aviso.set()
+
+    # Lote abierto (armado antes y aún sin confirmar) o uno nuevo con los pendientes más antiguos
+    def _tomar_lote(self):
+        with self._conectar() as conexion:
+            lote = conexion.execute("SELECT MIN(lote) FROM cola WHERE estado = 'pendiente'").fetchone()[0]
+            if lote is None:
+                filas = conexion.execute(
+                    "SELECT id, registro FROM cola WHERE estado = 'pendiente' ORDER BY orden LIMIT ?", (MAXIMO_LOTE,)
+                ).fetchall()
+                if not filas:
+                    return []
+                elegidos = dividir_en_lotes([(doc_id, _desde_json(registro)) for doc_id, registro in filas])[0]
+                lote = conexion.execute("SELECT COALESCE(MAX(lote), 0) + 1 FROM cola").fetchone()[0]
+                conexion.executemany("UPDATE cola SET lote = ? WHERE id = ?", [(lote, doc_id) for doc_id, _ in elegidos])
+            filas = conexion.execute("SELECT id, registro FROM cola WHERE lote = ? ORDER BY orden", (lote,)).fetchall()
+        return [(doc_id, _desde_json(registro)) for doc_id, registro in filas]
+
+    # Escribe un lote y lo marca confirmado; devuelve False si no quedaba nada pendiente.
+    # Si escribir_lote dice que ya estaba escrito (se cortó tras el commit), también queda confirmado.
+    def _enviar_lote(self):
+        lote = self._tomar_lote()
+        if not lote:
+            return False
+        ahora = datetime.now()
+        lote = [(doc_id, {**registro, "Fecha_Registro": ahora}) for doc_id, registro in lote]
+        try:
+            self.repositorio.escribir_lote(lote)
+        except Exception as e:
+            if not es_error_permanente(e):
+                raise
+            self._descartar_lote(lote, e)
+            return True
+        ids = [doc_id for doc_id, _ in lote]
+        with self._conectar() as conexion:
+            conexion.executemany(
+                "UPDATE cola SET estado = 'confirmado', confirmado = ? WHERE id = ?",
+                [(datetime.now().isoformat(), doc_id) for doc_id in ids]
+            )
+        if self.al_confirmar:
+            self.al_confirmar(lote)
+        return True
+
+    # Lote con un error permanente: si tiene varios movimientos se reparte en lotes de uno (nada se
+    # escribió, el commit es atómico) y si tiene uno solo queda en estado 'error'
+    def _descartar_lote(self, lote, error):
+        ids = [doc_id for doc_id, _ in lote]
+        with self._conectar() as conexion:
+            if len(lote) > 1:
+                primero = conexion.execute("SELECT MAX(lote) FROM cola").fetchone()[0] + 1
+                conexion.executemany("UPDATE cola SET lote = ? WHERE id = ?", [(primero + i, doc_id) for i, doc_id in enumerate(ids)])
+                return
+            conexion.execute("UPDATE cola SET estado = 'error', error = ? WHERE id = ?", (str(error), ids[0]))
+        print(f"Cola de escritura: el movimiento {ids[0]} no se puede escribir ({error}), queda con error")
+        if self.al_fallar:
+            self.al_fallar(lote)
@@ -0,0 +1,247 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+import agregaciones
+import instrumentacion
+from cola_escritura import ColaEscritura
+from datos import reemplazar_registro, registro_de, rango_mes
+from instantanea import sincronizar_con_instantanea, aplicar_con_instantanea, borrar_instantanea, guardar_instantanea
+from recursos import obtener_cache, obtener_repositorio
+from transformaciones import agregar_columnas_mes
+
+# Datos que comparten todas las secciones: lecturas en la cache del proceso, escrituras directas
+# y el listener en tiempo real. Se importa recién al entrar a la primera sección.
+# Cada sesión lee solo los movimientos de su usuario: las claves de la cache, la instantánea
+# y el listener son por usuario. Las escrituras llevan el usuario en el registro.
+repositorio = obtener_repositorio()
+cache = obtener_cache()
+ruta_instantanea = st.secrets.get("RUTA_INSTANTANEA", ".cache/movimientos.parquet")
+escuchas = OrderedDict()  # listeners en tiempo real de cada usuario, del menos al más usado
+MAXIMO_ESCUCHAS = int(st.secrets.get("MAXIMO_ESCUCHAS", 20))
+_lock_escuchas = threading.Lock()
+
+# Usuario con sesión iniciada
+def _usuario():
+    return st.session_state["usuario_actual"]
+
+def _repositorio(usuario):
+    return repositorio.de_usuario(usuario)
+
+# Una instantánea por usuario, junto a la ruta configurada. El nombre lleva el sha256 del usuario:
+# dos usuarios nunca comparten archivo, aunque sus nombres difieran solo en signos.
+def _instantanea(usuario):
+    base, extension = os.path.splitext(ruta_instantanea)
+    return f"{base}_{hashlib.sha256(usuario.encode()).hexdigest()}{extension}"
+
+# Movimientos del usuario desde la cache compartida. Al arrancar se parte de la instantánea en disco
+# y al vencer el TTL solo se traen los cambios; la instantánea se reescribe tras cada cambio.
+# Con el listener activo los cambios ya llegan solos y vencer el TTL no consulta nada.
+# El listener se inicia aquí y no en el tablero: necesita todos los movimientos del usuario en
+# memoria, y el tablero solo lee el resumen.
+def obtener_movimientos():
+    usuario = _usuario()
+    df, _ = _movimientos_y_marca(usuario)
+    iniciar_tiempo_real(usuario)
+    return df
+
+def _movimientos_y_marca(usuario):
+    return cache.obtener(
+        ("movimientos", usuario),
+        cargar=lambda: sincronizar_con_instantanea(_repositorio(usuario), _instantanea(usuario)),
+        refrescar=lambda valor: valor if escuchas.get(usuario) else sincronizar_con_instantanea(_repositorio(usuario), _instantanea(usuario), *valor)
+    )
+
+# Movimientos filtrados en la consulta al almacenamiento, solo con las columnas pedidas.
+# Cada combinación de filtros y columnas queda en la cache; sin filtros se usan los movimientos
+# compartidos, que ya están completos en memoria.
+def obtener_filtrados(tipos=None, categoria=None, mes=None, columnas=None):
+    if not tipos and not categoria and not mes:
+        return obtener_movimientos()
+    usuario = _usuario()
+    tipos = tuple(tipos) if tipos else None
+    columnas = tuple(columnas) if columnas else None
+    return cache.obtener(("filtrado", usuario, tipos, categoria, mes, columnas), cargar=lambda: _repositorio(usuario).cargar_filtrado(tipos, categoria, mes, columnas))
+
+def _clave_resumen(usuario, tipos, categoria, columnas, ventana=(None, None)):
+    return ("resumen", usuario, tuple(tipos) if tipos else None, categoria, tuple(columnas) if columnas else None, ventana)
+
+# Filas del resumen de una ventana (primer mes, último mes); cada ventana cargada queda en la cache
+def _resumen_de_ventana(clave):
+    _, usuario, tipos, categoria, columnas, (primero, ultimo) = clave
+    desde = rango_mes(primero)[0] if primero else None
+    hasta = rango_mes(ultimo)[1] if ultimo else None
+    return cache.obtener(clave, cargar=lambda: _repositorio(usuario).cargar_resumen(tipos, categoria, columnas, desde, hasta))
+
+# Usuario, filtros, ventanas y versión de cada ventana: identifica los datos con que se armó el tablero
+def _firma_resumen(usuario, tipos, categoria, columnas, ventanas):
+    claves = [_clave_resumen(usuario, tipos, categoria, columnas, ventana) for ventana in ventanas]
+    return claves[0][1:5] + (tuple(ventanas), tuple(cache.version(clave) for clave in claves))
+
+# Filas del resumen mensual (pocas) en lugar de todos los movimientos, solo de las ventanas de meses pedidas
+def obtener_resumen(tipos=None, categoria=None, columnas=None, ventanas=((None, None),)):
+    usuario = _usuario()
+    partes = [_resumen_de_ventana(_clave_resumen(usuario, tipos, categoria, columnas, ventana)) for ventana in ventanas]
+    firma = _firma_resumen(usuario, tipos, categoria, columnas, ventanas)
+    # Mes, Mes_Ordenado y Mes_Label se calculan una sola vez por versión de los datos
+    return cache.obtener(("columnas_mes",) + firma, cargar=lambda: _medido("transformación.columnas_mes", agregar_columnas_mes, pd.concat(partes, ignore_index=True)))
+
+# Cubo de agregación del tablero: uno por versión del resumen, tipos seleccionados y subcategoría
+def obtener_cubo(df, tipos=None, categoria=None, columnas=None, ventanas=((None, None),), tipos_seleccionados=(), subdetalle=None):
+    firma = _firma_resumen(_usuario(), tipos, categoria, columnas, ventanas)
+    clave_cubo = ("cubo",) + firma + (tuple(tipos_seleccionados), subdetalle)
+    return cache.obtener(clave_cubo, cargar=lambda: _medido("agregación.cubo", agregaciones.construir_cubo, df, tipos_seleccionados, subdetalle))
+
+# Figura del tablero ya armada, una por versión del resumen y estado de los filtros: al repetir una
+# vista no se corta el cubo ni se arma la figura. Se guarda el objeto de Plotly y no su dict, porque
+# st.plotly_chart vuelve a validar los dict armando la figura otra vez. No se debe modificar.
+def obtener_figura(nombre, construir, fechas=(), tipos=None, categoria=None, columnas=None, ventanas=((None, None),), tipos_seleccionados=(), subdetalle=None):
+    firma = _firma_resumen(_usuario(), tipos, categoria, columnas, ventanas)
+    clave = ("figura",) + firma + (nombre, tuple(tipos_seleccionados), subdetalle, tuple(fechas))
+    return cache.obtener(clave, cargar=lambda: _medido(f"figura.{nombre}", construir))
+
+def _medido(nombre, funcion, *args):
+    with instrumentacion.medir(nombre):
+        return funcion(*args)
+
+def obtener_meses():
+    usuario = _usuario()
+    return cache.obtener(("meses", usuario), cargar=lambda: _repositorio(usuario).meses_disponibles())
+
+# Después de guardar o eliminar, las consultas del usuario quedan desactualizadas (las de los demás no cambian)
+def invalidar_consultas(usuario):
+    for prefijo in ["filtrado", "meses", "resumen", "columnas_mes", "cubo", "figura"]:
+        cache.invalidar_prefijo(prefijo, usuario)
+
+# Trae a la cache los cambios hechos desde la última marca
+def sincronizar_movimientos():
+    usuario = _usuario()
+    cache.actualizar(("movimientos", usuario), lambda valor: sincronizar_con_instantanea(_repositorio(usuario), _instantanea(usuario), *valor))
+    invalidar_consultas(usuario)
+
+
+# Escritura directa: el cambio se aplica a los movimientos en memoria por su id y luego se escribe
+# en el almacenamiento, sin volver a leer nada. cambios=None elimina el movimiento. Si la escritura
+# falla se restaura lo que había en memoria para ese id y el error sigue hacia arriba.
+def escribir_movimiento(doc_id, escribir, cambios=None):
+    usuario = _usuario()
+    anterior = {}
+
+    def aplicar(valor):
+        df, marca = valor
+        anterior["registro"] = registro_de(df, doc_id)
+        registro = None if cambios is None else {**(anterior["registro"] or {}), **cambios}
+        return reemplazar_registro(df, doc_id, registro), marca
+
+    cache.actualizar(("movimientos", usuario), aplicar)
+    try:
+        escribir()
+    except Exception:
+        if anterior:
+            cache.actualizar(("movimientos", usuario), lambda valor: (reemplazar_registro(valor[0], doc_id, anterior["registro"]), valor[1]))
+        raise
+    finally:
+        invalidar_consultas(usuario)
+
+# Pide a las sesiones abiertas del usuario (o a todas) que vuelvan a dibujarse. Streamlit no tiene
+# una API pública para esto, así que se usa la del runtime y, si cambia, solo se pierde el aviso.
+def redibujar_sesiones(usuario=None):
+    try:
+        from streamlit.runtime import Runtime
+        if not Runtime.exists():
+            return
+        for info in Runtime.instance()._session_mgr.list_active_sessions():
+            estado = info.session.session_state
+            if usuario is None or ("usuario_actual" in estado and estado["usuario_actual"] == usuario):
+                info.session.request_rerun(None)
+    except Exception as e:
+        print(f"No se pudo redibujar las sesiones: {e}")
+
+# Un listener por usuario en el proceso, compartido por todas sus sesiones: aplica a la cache los
+# cambios hechos desde otros dispositivos (la versión de sus movimientos sube con cada cambio)
+# y redibuja sus sesiones. Un usuario sin movimientos todavía no tiene marca desde la que
+# escuchar: no se guarda nada y se vuelve a intentar en su próxima lectura de movimientos.
+# Quedan abiertos a lo sumo MAXIMO_ESCUCHAS: al pasarse se cierran los del usuario que lleva más
+# tiempo sin leer sus movimientos, que vuelve a sincronizar al vencer el TTL hasta su próxima lectura.
+def iniciar_tiempo_real(usuario):
+    if not st.secrets.get("TIEMPO_REAL", True):
+        return None
+    with _lock_escuchas:
+        if usuario in escuchas:
+            escuchas.move_to_end(usuario)
+            return escuchas[usuario]
+    _, marca = _movimientos_y_marca(usuario)
+    if marca is None:
+        return None
+
+    def al_cambiar(cambiados, eliminados):
+        instrumentacion.contar(leidos=len(cambiados) + len(eliminados))
+        cache.actualizar(("movimientos", usuario), lambda valor: aplicar_con_instantanea(_instantanea(usuario), *valor, cambiados, eliminados, usuario))
+        invalidar_consultas(usuario)
+        redibujar_sesiones(usuario)
+
+    desalojados = []
+    with _lock_escuchas:
+        if usuario not in escuchas:
+            escuchas[usuario] = _repositorio(usuario).escuchar(marca, al_cambiar)
+        activos = escuchas[usuario]
+        while len(escuchas) > MAXIMO_ESCUCHAS:
+            desalojados.append(escuchas.popitem(last=False)[1])
+    for listeners in desalojados:
+        for listener in listeners or []:
+            try:
+                listener.unsubscribe()
+            except Exception as e:
+                print(f"No se pudo cerrar el listener: {e}")
+    return activos
+
+# Quita movimientos que nunca llegaron al almacenamiento de la cache del usuario y de su instantánea
+def _quitar_movimientos(usuario, ids):
+    def quitar(valor):
+        df, marca = valor
+        restantes = df[~df["id"].isin(ids)].reset_index(drop=True)
+        if len(restantes) < len(df):
+            try:
+                guardar_instantanea(restantes, marca, _instantanea(usuario), usuario)
+            except Exception as e:
+                print(f"Error al guardar la instantánea: {e}")
+        return restantes, marca
+
+    cache.actualizar(("movimientos", usuario), quitar)
+
+# Cola de escritura única por proceso para los movimientos nuevos del formulario. Cuando confirma
+# un lote, las consultas se vuelven a leer y las sesiones se redibujan con el estado al día.
+# Un movimiento que no se podrá escribir se quita de la cache y de la instantánea, donde había
+# entrado al registrarlo.
+# COLA_ESCRITURA = false vuelve a escribir cada movimiento al momento.
+@st.cache_resource
+def iniciar_cola():
+    if not st.secrets.get("COLA_ESCRITURA", True):
+        return None
+
+    def al_confirmar(lote):
+        for usuario in {registro.get("Usuario") for _, registro in lote}:
+            invalidar_consultas(usuario)
+            redibujar_sesiones(usuario)
+
+    def al_fallar(lote):
+        for usuario in {registro.get("Usuario") for _, registro in lote}:
+            _quitar_movimientos(usuario, [doc_id for doc_id, registro in lote if registro.get("Usuario") == usuario])
+            invalidar_consultas(usuario)
+            redibujar_sesiones(usuario)
+
+    ruta = st.secrets.get("RUTA_COLA_ESCRITURA", ".cache/cola_escritura.db")
+    return ColaEscritura(repositorio, ruta, al_confirmar, al_fallar).iniciar()
+
+cola = iniciar_cola()
+
+# Borra la instantánea y la cache del usuario: la próxima lectura trae todos sus movimientos de nuevo
+def recargar_todo():
+    usuario = _usuario()
+    borrar_instantanea(_instantanea(usuario))
+    cache.invalidar(("movimientos", usuario))
+    invalidar_consultas(usuario)
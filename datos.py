@@ -0,0 +1,395 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import chain
+
+from firebase_admin import firestore
+from google.api_core.exceptions import GoogleAPICallError
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from resumenes import sumar_al_resumen, sumar_lote_al_resumen, mover_lote_en_resumen, datos_resumen, id_resumen
+from esquema import tipar, unificar_categorias, sin_tipos
+
+# Colecciones en Firebase
+COLECCION = "movimientos"
+COLECCION_ELIMINADOS = "movimientos_eliminados"
+
+CAMPOS_FECHA = ["Fecha", "Fecha_Registro", "Fecha_Real", "Fecha_Actualizacion"]
+COLUMNAS = CAMPOS_FECHA + ["Tipo", "Categoría", "Detalle", "Subdetalle", "Forma de pago", "Monto", "Comentario", "Usuario"]
+
+# Margen para cubrir diferencias de reloj entre servidores al sincronizar
+MARGEN_SINCRONIZACION = timedelta(minutes=5)
+
+# Tope de hilos para leer particiones a la vez, aunque se pidan más particiones
+HILOS_MAXIMOS = 8
+
+
+# Convierte un valor de Firebase a fecha sin zona horaria
+def _a_fecha(valor):
+    dt = pd.to_datetime(valor)
+    if dt.tzinfo is not None:
+        dt = dt.tz_localize(None)
+    return dt
+
+
+# Arma el DataFrame columna por columna a partir de pares (id, datos).
+# Con columnas solo se arman esas (proyección); sin ellas, COLUMNAS y cualquier campo extra.
+def _dataframe_desde_filas(filas, columnas=None):
+    buffers = {campo: [] for campo in (COLUMNAS if columnas is None else columnas)}
+    ids = []
+    for doc_id, data in filas:
+        for campo, valor in data.items():
+            buffer = buffers.get(campo)
+            if buffer is None:
+                if columnas is not None:
+                    continue
+                buffer = buffers[campo] = [None] * len(ids)
+            buffer.append(valor)
+        ids.append(doc_id)
+        for buffer in buffers.values():
+            if len(buffer) < len(ids):
+                buffer.append(None)
+
+    df = pd.DataFrame(buffers)
+    df["id"] = ids
+    # Una sola conversión vectorizada por campo de fecha (errores -> NaT)
+    for campo in CAMPOS_FECHA:
+        if campo in df:
+            df[campo] = pd.to_datetime(df[campo], errors="coerce", utc=True).dt.tz_localize(None)
+    # Textos como categóricos y Monto en centavos (ver esquema.py)
+    return tipar(df)
+
+
+# Construye el DataFrame de movimientos a partir de los documentos de Firebase
+def construir_dataframe(docs, columnas=None):
+    return _dataframe_desde_filas(((doc.id, doc.to_dict()) for doc in docs), columnas)
+
+
+# Pide a Firebase solo esos campos. Los nombres con espacios o tildes ("Forma de pago", "Categoría")
+# tienen que ir entre comillas invertidas, por eso se arman con FieldPath.
+def proyectar(consulta, columnas=None):
+    if columnas is None:
+        return consulta
+    return consulta.select([FieldPath(campo).to_api_repr() for campo in columnas])
+
+
+# Función para cargar registros desde Firebase (todos los campos o solo las columnas pedidas).
+# Con más de una partición la colección se lee en paralelo (ver cargar_en_paralelo).
+# Con usuario solo se leen sus movimientos.
+def cargar_datos(db, columnas=None, particiones=1, usuario=None):
+    if particiones > 1:
+        return cargar_en_paralelo(particionar(db, particiones, usuario), columnas)
+    return construir_dataframe(proyectar(construir_consulta(db, usuario=usuario), columnas).stream(), columnas)
+
+
+# Consultas que juntas cubren toda la colección, una por partición. Se usan las particiones de
+# Firestore (cortes por id de documento); si no están disponibles, rangos de Fecha_Real.
+# Las particiones de Firestore no admiten filtros: los movimientos de un usuario se parten por Fecha_Real.
+def particionar(db, particiones, usuario=None):
+    if usuario is not None:
+        return _rangos_fecha_real(db, particiones, usuario)
+    try:
+        return [p.query() for p in db.collection_group(COLECCION).get_partitions(particiones)]
+    except (AttributeError, GoogleAPICallError) as e:
+        print(f"Particiones de Firestore no disponibles ({e}), se parte por Fecha_Real")
+        return _rangos_fecha_real(db, particiones)
+
+
+# Rangos de Fecha_Real cortados al inicio de meses repartidos entre el primero y el último,
+# más los movimientos sin Fecha_Real, que no entran en ningún rango
+def _rangos_fecha_real(db, particiones, usuario=None):
+    meses = meses_disponibles(db, usuario)
+    cortes = sorted({rango_mes(meses[len(meses) * i // particiones])[0] for i in range(1, particiones)}) if meses else []
+    if not cortes:
+        return [construir_consulta(db, usuario=usuario)]
+    limites = [None] + cortes + [None]
+    return [construir_consulta(db, usuario=usuario).where("Fecha_Real", "==", None)] + [
+        construir_consulta(db, desde=desde, hasta=hasta, usuario=usuario) for desde, hasta in zip(limites, limites[1:])
+    ]
+
+
+# Lee las consultas a la vez, cada una en su hilo, y junta los resultados ordenados por id:
+# el DataFrame no depende de cómo se partió la colección ni de qué hilo terminó primero.
+def cargar_en_paralelo(consultas, columnas=None):
+    def leer(consulta):
+        return construir_dataframe(proyectar(consulta, columnas).stream(), columnas)
+
+    with ThreadPoolExecutor(max_workers=min(len(consultas), HILOS_MAXIMOS)) as ejecutor:
+        partes = [parte for parte in ejecutor.map(leer, consultas) if not parte.empty]
+    if not partes:
+        return construir_dataframe([], columnas)
+    df = unificar_categorias(pd.concat(partes, ignore_index=True))
+    return df.sort_values("id", ignore_index=True)
+
+
+# Traduce los filtros seleccionados a cláusulas where de Firebase. Con usuario la consulta queda
+# limitada a sus documentos (índices compuestos que empiezan por Usuario en firestore.indexes.json).
+def construir_consulta(db, tipos=None, categoria=None, desde=None, hasta=None, coleccion=COLECCION, usuario=None):
+    consulta = db.collection(coleccion)
+    if usuario is not None:
+        consulta = consulta.where("Usuario", "==", usuario)
+    if tipos:
+        tipos = list(tipos)
+        consulta = consulta.where("Tipo", "==", tipos[0]) if len(tipos) == 1 else consulta.where("Tipo", "in", tipos)
+    if categoria:
+        consulta = consulta.where("Categoría", "==", categoria)
+    if desde is not None:
+        consulta = consulta.where("Fecha_Real", ">=", desde)
+    if hasta is not None:
+        consulta = consulta.where("Fecha_Real", "<", hasta)
+    return consulta
+
+
+# Carga solo los movimientos que cumplen los filtros
+def cargar_filtrado(db, tipos=None, categoria=None, mes=None, columnas=None, usuario=None):
+    desde, hasta = rango_mes(mes) if mes else (None, None)
+    consulta = proyectar(construir_consulta(db, tipos, categoria, desde, hasta, usuario=usuario), columnas)
+    return construir_dataframe(consulta.stream(), columnas)
+
+
+# Primer día del mes y primer día del mes siguiente para un periodo "YYYY-MM"
+def rango_mes(mes):
+    periodo = pd.Period(mes, freq="M")
+    return periodo.start_time.to_pydatetime(), (periodo + 1).start_time.to_pydatetime()
+
+
+# Meses (YYYY-MM) entre el primer y el último movimiento, leyendo solo dos documentos.
+# El filtro deja fuera los movimientos sin Fecha_Real, que Firestore ordena antes que cualquier fecha.
+def meses_disponibles(db, usuario=None):
+    coleccion = construir_consulta(db, usuario=usuario).where("Fecha_Real", ">", datetime.min)
+    extremos = []
+    for direccion in ["ASCENDING", "DESCENDING"]:
+        for doc in coleccion.order_by("Fecha_Real", direction=direccion).limit(1).stream():
+            extremos.append(_a_fecha(doc.to_dict()["Fecha_Real"]))
+    return meses_entre(extremos[0], extremos[-1]) if extremos else []
+
+
+# Periodos "YYYY-MM" desde el mes de inicio hasta el de fin, ambos incluidos
+def meses_entre(inicio, fin):
+    return [str(p) for p in pd.period_range(pd.Timestamp(inicio), pd.Timestamp(fin), freq="M")]
+
+
+# Agrega un registro recién guardado al DataFrame en memoria.
+# El listener puede haberlo traído antes, así que se reemplaza si ya está.
+def agregar_registro(df, doc_id, registro):
+    nuevo = _dataframe_desde_filas([(doc_id, registro)])
+    if df is None or df.empty:
+        return nuevo
+    df = df[df["id"] != doc_id]
+    return unificar_categorias(pd.concat([df, nuevo], ignore_index=True))
+
+
+# Pone en memoria el registro de ese id, o lo quita si registro es None
+def reemplazar_registro(df, doc_id, registro):
+    if registro is None:
+        return df[df["id"] != doc_id].reset_index(drop=True)
+    return agregar_registro(df, doc_id, registro)
+
+
+# Movimiento en memoria como registro de Firebase (textos y soles), o None si no está
+def registro_de(df, doc_id):
+    fila = df[df["id"] == doc_id]
+    if fila.empty:
+        return None
+    return convertir_df_firebase(sin_tipos(fila.drop(columns="id")))[0]
+
+
+# Ajuste para evitar error al eliminar (solución TypeError: sequence item 1)
+def convertir_valores_firebase(row):
+    datos = {}
+    for col, valor in row.items():
+        if pd.isnull(valor):
+            datos[col] = None
+        elif isinstance(valor, pd.Timestamp):
+            datos[col] = valor.to_pydatetime()
+        elif isinstance(valor, (float, int, str)):
+            datos[col] = valor
+        else:
+            datos[col] = str(valor)
+    return datos
+
+
+# Versión vectorizada de convertir_valores_firebase para un DataFrame completo
+def convertir_df_firebase(df):
+    datos = df.astype(object).where(df.notna(), None)
+    for col in df.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        fechas = pd.Series(pd.DatetimeIndex(df[col]).to_pydatetime(), index=df.index, dtype=object)
+        datos[col] = fechas.where(df[col].notna(), None)
+    return datos.to_dict("records")
+
+
+# Marca de agua: la fecha más reciente de registro o actualización conocida
+def calcular_marca(df, marca_anterior=None):
+    fechas = [marca_anterior] if marca_anterior is not None else []
+    for campo in ["Fecha_Registro", "Fecha_Actualizacion"]:
+        if campo in df:
+            valor = df[campo].max()
+            if pd.notna(valor):
+                fechas.append(valor.to_pydatetime())
+    return max(fechas) if fechas else None
+
+
+# Trae solo los documentos creados, actualizados o eliminados desde la marca
+def cargar_cambios(db, marca, usuario=None):
+    desde = marca - MARGEN_SINCRONIZACION
+    coleccion = construir_consulta(db, usuario=usuario)
+    docs = chain.from_iterable(
+        coleccion.where(campo, ">", desde).stream() for campo in ["Fecha_Registro", "Fecha_Actualizacion"]
+    )
+    cambiados = construir_dataframe(docs).drop_duplicates(subset="id", keep="last")
+
+    eliminados = {}
+    for doc in construir_consulta(db, coleccion=COLECCION_ELIMINADOS, usuario=usuario).where("Fecha_Eliminacion", ">", desde).stream():
+        eliminados[doc.id] = _a_fecha(doc.to_dict()["Fecha_Eliminacion"]).to_pydatetime()
+    return cambiados, eliminados
+
+
+# Combina los cambios con los registros en memoria y devuelve la nueva marca.
+# repositorio es cualquier motor de almacenamiento.Repositorio.
+def sincronizar(repositorio, df, marca):
+    if marca is None:
+        df = repositorio.cargar_movimientos()
+        return df, calcular_marca(df)
+
+    cambiados, eliminados = repositorio.cargar_cambios(marca)
+    return aplicar_cambios(df, marca, cambiados, eliminados)
+
+
+# Reemplaza los movimientos cambiados, quita los eliminados y avanza la marca
+def aplicar_cambios(df, marca, cambiados, eliminados):
+    if cambiados.empty and not eliminados:
+        return df, marca
+
+    quitar = set(cambiados["id"]) | set(eliminados)
+    df = df[~df["id"].isin(quitar)]
+    if not cambiados.empty:
+        df = unificar_categorias(pd.concat([df, cambiados], ignore_index=True)) if not df.empty else cambiados
+    return df.reset_index(drop=True), calcular_marca(cambiados, max([marca, *eliminados.values()]))
+
+
+# Escucha en segundo plano los movimientos creados, actualizados o eliminados después de la marca.
+# al_cambiar(cambiados, eliminados) recibe lo mismo que devuelve cargar_cambios.
+def escuchar_cambios(db, marca, al_cambiar, usuario=None):
+    desde = marca - MARGEN_SINCRONIZACION
+
+    def en_movimientos(docs, cambios, momento):
+        # Un documento solo sale de estas consultas al borrarse, y eso llega por su lápida
+        filas = [(c.document.id, c.document.to_dict()) for c in cambios if c.type.name != "REMOVED"]
+        if filas:
+            al_cambiar(_dataframe_desde_filas(filas), {})
+
+    def en_eliminados(docs, cambios, momento):
+        eliminados = {
+            c.document.id: _a_fecha(c.document.to_dict()["Fecha_Eliminacion"]).to_pydatetime()
+            for c in cambios if c.type.name != "REMOVED"
+        }
+        if eliminados:
+            al_cambiar(_dataframe_desde_filas([]), eliminados)
+
+    coleccion = construir_consulta(db, usuario=usuario)
+    return [
+        coleccion.where("Fecha_Registro", ">", desde).on_snapshot(en_movimientos),
+        coleccion.where("Fecha_Actualizacion", ">", desde).on_snapshot(en_movimientos),
+        construir_consulta(db, coleccion=COLECCION_ELIMINADOS, usuario=usuario)
+        .where("Fecha_Eliminacion", ">", desde).on_snapshot(en_eliminados),
+    ]
+
+
+# Conecta con Firebase fuera de Streamlit (scripts de mantenimiento)
+def conectar_firestore(ruta_credenciales):
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(ruta_credenciales))
+    return firestore.client()
+
+
+# Id nuevo para un movimiento. Firebase lo genera en el cliente, sin consultar nada.
+def nuevo_id(db):
+    return db.collection(COLECCION).document().id
+
+
+# Guarda un movimiento nuevo y suma su monto al resumen mensual en un mismo batch
+def agregar_movimiento(db, registro, doc_id=None):
+    ref = db.collection(COLECCION).document(doc_id)
+    batch = db.batch()
+    batch.set(ref, registro)
+    sumar_al_resumen(batch, db, registro)
+    batch.commit()
+    return ref.id
+
+
+# Parte los registros (id, datos) en lotes que, sumando las filas del resumen, no pasan de 500 escrituras
+def dividir_en_lotes(registros, limite=500):
+    lotes, lote, claves = [], [], set()
+    for doc_id, registro in registros:
+        datos = datos_resumen(registro)
+        nuevas = {id_resumen(datos)} - claves if datos is not None else set()
+        if lote and len(lote) + 1 + len(claves) + len(nuevas) > limite:
+            lotes.append(lote)
+            lote, claves = [], set()
+            nuevas = {id_resumen(datos)} if datos is not None else set()
+        lote.append((doc_id, registro))
+        claves |= nuevas
+    if lote:
+        lotes.append(lote)
+    return lotes
+
+
+# Guarda un lote de movimientos con id conocido y sus sumas del resumen en un solo commit.
+# Si el primer documento ya existe, el lote se confirmó antes y no se vuelve a escribir.
+def escribir_lote(db, lote):
+    coleccion = db.collection(COLECCION)
+    if coleccion.document(lote[0][0]).get().exists:
+        return False
+    batch = db.batch()
+    for doc_id, registro in lote:
+        batch.set(coleccion.document(doc_id), registro)
+    sumar_lote_al_resumen(batch, db, [registro for _, registro in lote])
+    batch.commit()
+    return True
+
+
+# Actualiza un lote de (id, registro anterior, cambios) en un solo commit, moviendo los montos
+# en el resumen. El registro anterior es el que se leyó antes: conviene que nadie edite esos
+# movimientos mientras tanto.
+def actualizar_lote(db, lote):
+    coleccion = db.collection(COLECCION)
+    batch = db.batch()
+    for doc_id, _, cambios in lote:
+        batch.update(coleccion.document(doc_id), cambios)
+    mover_lote_en_resumen(batch, db, [(anterior, {**anterior, **cambios}) for _, anterior, cambios in lote])
+    batch.commit()
+
+
+@firestore.transactional
+def _actualizar_en_transaccion(transaccion, db, doc_id, cambios):
+    ref = db.collection(COLECCION).document(doc_id)
+    anterior = ref.get(transaction=transaccion).to_dict()
+    sumar_al_resumen(transaccion, db, anterior, -1)
+    sumar_al_resumen(transaccion, db, {**anterior, **cambios}, 1)
+    transaccion.update(ref, cambios)
+
+
+# Actualiza un movimiento moviendo su monto entre filas del resumen en una transacción
+def actualizar_movimiento(db, doc_id, cambios):
+    _actualizar_en_transaccion(db.transaction(), db, doc_id, cambios)
+
+
+@firestore.transactional
+def _eliminar_en_transaccion(transaccion, db, doc_id):
+    ref = db.collection(COLECCION).document(doc_id)
+    anterior = ref.get(transaction=transaccion).to_dict()
+    if anterior is not None:
+        sumar_al_resumen(transaccion, db, anterior, -1)
+    transaccion.delete(ref)
+    transaccion.set(db.collection(COLECCION_ELIMINADOS).document(doc_id), {
+        "Fecha_Eliminacion": datetime.now(),
+        "Usuario": anterior.get("Usuario") if anterior else None,
+    })
+
+
+# Elimina un movimiento dejando una lápida (con su usuario) para que las demás sesiones lo sepan
+def eliminar_movimiento(db, doc_id):
+    _eliminar_en_transaccion(db.transaction(), db, doc_id)
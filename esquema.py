@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from catalogos import formas_pago, combinaciones_validas
+
+# Cambia cuando cambia la forma de guardar los movimientos en memoria (invalida las instantáneas viejas)
+VERSION_ESQUEMA = "2"
+
+CAMPOS_CATEGORICOS = ["Tipo", "Categoría", "Detalle", "Subdetalle", "Forma de pago", "Usuario"]
+
+
+# Valores conocidos de antemano para cada campo, tomados de los catálogos del formulario
+def _categorias_base():
+    combinaciones = combinaciones_validas()
+    return {
+        "Tipo": sorted({c[0] for c in combinaciones}),
+        "Categoría": sorted({c[1] for c in combinaciones}),
+        "Detalle": sorted({c[2] for c in combinaciones}),
+        "Subdetalle": sorted({c[3] for c in combinaciones}),
+        "Forma de pago": sorted(formas_pago),
+        "Usuario": [],
+    }
+
+
+CATEGORIAS = _categorias_base()
+
+
+# Categórico con los valores del catálogo más los que aparezcan en los datos (registros antiguos, importados)
+def a_categorico(serie, campo):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    base = CATEGORIAS[campo]
+    categorias = sorted(set(base) | set(serie.dropna().unique()), key=str)
+    return pd.Categorical(serie, categories=categorias)
+
+
+# Montos en soles -> centavos enteros: las sumas son exactas y no acumulan error de redondeo
+def a_centavos(montos):
+    montos = pd.to_numeric(montos, errors="coerce").fillna(0).to_numpy(dtype="float64")
+    return np.round(montos * 100).astype("int64")
+
+
+def a_soles(centavos):
+    return centavos / 100
+
+
+# Convierte un DataFrame recién leído del almacenamiento (Monto en soles, textos como object)
+def tipar(df):
+    columnas = {campo: a_categorico(df[campo], campo) for campo in CAMPOS_CATEGORICOS if campo in df}
+    if "Monto" in df:
+        columnas["Monto"] = a_centavos(df["Monto"])
+    return df.assign(**columnas)
+
+
+# Tras un concat con valores nuevos pandas deja los categóricos como object: se vuelven a tipar
+def unificar_categorias(df):
+    columnas = {
+        campo: a_categorico(df[campo], campo)
+        for campo in CAMPOS_CATEGORICOS
+        if campo in df and not isinstance(df[campo].dtype, pd.CategoricalDtype)
+    }
+    return df.assign(**columnas) if columnas else df
+
+
+# De vuelta a textos y soles, para escribir en el almacenamiento
+def sin_tipos(df):
+    columnas = {campo: df[campo].astype(object) for campo in CAMPOS_CATEGORICOS if campo in df}
+    if "Monto" in df:
+        columnas["Monto"] = a_soles(df["Monto"])
+    return df.assign(**columnas)
@@ -0,0 +1,170 @@
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Figuras del tablero "Visualización". Reciben los cortes ya agregados (ver agregaciones.py).
+
+# Evolutivo mensual de Ingresos vs Egresos
+def figura_evolutivo(df_group):
+    fig = px.line(df_group, x="Mes_Label", y="Monto", color="Tipo", markers=True, text="Monto",
+                  line_shape="spline",
+                title="📊 Evolutivo de Ingresos vs Egresos",
+                 color_discrete_map = {
+                  "Ingreso": "#0cb7f2",  # Morado
+                  "Egreso": "#ff69b4"    # Rosado tenue
+                  })
+    # Formato del texto
+    fig.update_traces(
+        texttemplate="%{text:.2f}",
+        textposition="top center",
+        marker=dict(size=8)
+    )
+
+    for trace in fig.data:
+        if trace.name == "Egreso":
+            trace.textposition = "bottom center"
+        elif trace.name == "Ingreso":
+            trace.textposition = "top center"
+
+    fig.update_layout(
+        xaxis_title="Mes Año",
+        yaxis_title="Monto (S/.)",
+        legend_title="Tipo",
+        font=dict(color='white'),
+        plot_bgcolor='#1e1e1e',
+        paper_bgcolor='#1e1e1e',
+        hovermode="x unified"
+    )
+    # fig.update_layout(xaxis_title="Mes Año", yaxis_title="Monto (S/.)", legend_title="Tipo")
+    return fig
+
+
+# Barras de montos por categoría, agrupadas por tipo
+def figura_categorias(df_categoria):
+    # Colores personalizados
+    colors = {
+        "Ingreso": "#0cb7f2",
+        "Egreso": "#ff69b4"
+    }
+
+    # Crear figura y agregar barras por tipo
+    fig_cat = go.Figure()
+
+    for tipo in df_categoria["Tipo"].unique():
+        data = df_categoria[df_categoria["Tipo"] == tipo]
+        fig_cat.add_trace(go.Bar(
+            x=data["Categoría"],
+            y=data["Monto"],
+            name=tipo,
+            marker_color=colors[tipo],
+            text=[f"${v:,.2f}" for v in data["Monto"]],
+            textposition='outside'
+        ))
+
+    # Ajustes visuales
+    fig_cat.update_layout(
+        title="Distribución de Montos por Categoría",
+        xaxis_title="Categoría",
+        yaxis_title="Monto",
+        barmode='group',
+        font=dict(color='white'),
+        plot_bgcolor='#1e1e1e',
+        paper_bgcolor='#1e1e1e',
+        legend=dict(font=dict(color='white'))
+    )
+    return fig_cat
+
+
+# Variación (Ingreso - Egreso) por mes
+def figura_variacion_mensual(df_mes_cat):
+    df_mes_cat["Color"] = df_mes_cat["Variación"].apply(lambda x: "Variación Positiva" if x >= 0 else "Variación Negativa")
+    fig_var_mes = px.bar(df_mes_cat, x="Mes_Label", y="Variación", color="Color", barmode="group",
+                         title="Variación Mensual", color_discrete_map={
+                             "Variación Positiva": "lightgreen",
+                             "Variación Negativa": "red"
+                         })
+    fig_var_mes.update_layout(xaxis_title="Mes Año", height=400)
+    return fig_var_mes
+
+
+# Variación (Ingreso - Egreso) por categoría
+def figura_variacion_categoria(df_cat):
+    df_cat["Color"] = df_cat["Variación"].apply(lambda x: "Positiva" if x >= 0 else "Negativa")
+
+    fig_var_cat = px.bar(
+        df_cat,
+        x="Categoría",
+        y="Variación",
+        color="Color",
+        barmode="group",
+        title="Variación total por categoría",
+        color_discrete_map={
+            "Positiva": "#90ee90",   # lightgreen
+            "Negativa": "#FF9999"    # rojo claro/daltónico friendly
+        },
+        text="Variación"
+    )
+
+    # Formato del texto
+    fig_var_cat.update_traces(texttemplate="%{text:.2f}", textposition="outside")
+
+    # Layout visual
+    fig_var_cat.update_layout(
+        xaxis_title="Categoría",
+        yaxis_title="Variación (Ingreso - Egreso)",
+        font=dict(color='white'),
+        plot_bgcolor='#1e1e1e',
+        paper_bgcolor='#1e1e1e',
+        legend=dict(font=dict(color='white'))
+    )
+    return fig_var_cat
+
+
+# Comparativa por subcategoría en Vivienda
+def figura_vivienda(df_viv_group):
+    # Obtenemos lista única de subcategorías y tipos
+    detalles = df_viv_group["Detalle"].unique()
+    tipos = df_viv_group["Tipo"].unique()
+
+    #fig_viv = px.bar(df_viv_group, x="Detalle", y="Monto", color="Tipo", barmode="group",
+    #                 title="Comparativa por Subcategoría en Vivienda",
+    #                 color_discrete_map = {
+    #                      "Ingreso": "#0cb7f2",  # Morado
+    #                      "Egreso": "#ff69b4"    # Rosado tenue
+    #                      })
+
+    fig = go.Figure()
+
+    colors = {"Ingreso": "#0cb7f2", "Egreso": "#ff69b4"}
+
+    for tipo in tipos:
+        data = df_viv_group[df_viv_group["Tipo"] == tipo]
+        fig.add_trace(go.Bar(
+            x=data["Detalle"],
+            y=data["Monto"],
+            name=tipo,
+            marker_color=colors[tipo],
+            text=[f"${v:,.2f}" for v in data["Monto"]],
+            textposition='outside'
+        ))
+
+    # Layout
+    fig.update_layout(
+        title="Comparativa por Subcategoría en Vivienda",
+        barmode='group',
+        xaxis_title="Detalle",
+        yaxis_title="Monto",
+        uniformtext_minsize=8,
+        uniformtext_mode='show',
+        font=dict(color='white'),
+        plot_bgcolor='#1e1e1e',
+        paper_bgcolor='#1e1e1e',
+        legend=dict(font=dict(color='white'))
+    )
+    return fig
+
+
+# Comparativa por subcategoría en Servicios
+def figura_servicios(df_viv_group):
+    fig_viv = px.bar(df_viv_group, x="Detalle", y="Monto", color="Tipo", barmode="group",
+                     title="Comparativa por Subcategoría en Servicios")
+    return fig_viv
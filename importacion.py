@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import unicodedata
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+
+from catalogos import formas_pago, combinaciones_validas
+from datos import convertir_df_firebase, dividir_en_lotes
+from transformaciones import calcular_fecha_real
+
+COLUMNAS_IMPORTACION = ["Fecha", "Tipo", "Categoría", "Detalle", "Subdetalle", "Forma de pago", "Monto", "Comentario"]
+
+# Nombres de columna habituales en los extractos de BCP, Interbank y BBVA
+ALIAS_COLUMNAS = {
+    "fecha": "Fecha", "fecha operacion": "Fecha", "fecha de operacion": "Fecha", "fecha proceso": "Fecha",
+    "tipo": "Tipo",
+    "categoria": "Categoría",
+    "detalle": "Detalle",
+    "subdetalle": "Subdetalle",
+    "forma de pago": "Forma de pago", "banco": "Forma de pago",
+    "monto": "Monto", "importe": "Monto", "monto (s/.)": "Monto", "cargo/abono": "Monto",
+    "comentario": "Comentario", "descripcion": "Comentario", "concepto": "Comentario", "descripcion operacion": "Comentario",
+}
+
+CARPETA_PROGRESO = ".importaciones"
+
+
+def _sin_tildes(texto):
+    texto = unicodedata.normalize("NFKD", str(texto).strip().lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+# Lee un CSV o un Excel .xlsx (necesita openpyxl; .xls no, haría falta xlrd) y devuelve el DataFrame y la huella del archivo
+def leer_archivo(contenido, nombre):
+    huella = hashlib.sha256(contenido).hexdigest()[:12]
+    if nombre.lower().endswith(".xlsx"):
+        df = pd.read_excel(io.BytesIO(contenido))
+    else:
+        df = pd.read_csv(io.BytesIO(contenido), sep=None, engine="python", encoding="utf-8-sig")
+    return df, huella
+
+
+# Renombra las columnas conocidas y completa las que faltan
+def normalizar_columnas(df, forma_pago=None):
+    df = df.rename(columns={c: ALIAS_COLUMNAS.get(_sin_tildes(c), c) for c in df.columns})
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    monto = df["Monto"] if "Monto" in df else pd.Series(float("nan"), index=df.index)
+    if monto.dtype == object:
+        monto = monto.astype(str).str.replace(r"[^\d.\-]", "", regex=True)
+    monto = pd.to_numeric(monto, errors="coerce")
+    # Los extractos traen cargos en negativo: si no hay columna Tipo se deduce del signo
+    if "Tipo" not in df:
+        df["Tipo"] = pd.Series("Ingreso", index=df.index).where(monto >= 0, "Egreso")
+    df["Monto"] = monto.abs()
+
+    if "Forma de pago" not in df:
+        df["Forma de pago"] = forma_pago
+    for columna in ["Detalle", "Subdetalle"]:
+        if columna not in df:
+            df[columna] = "-"
+    if "Comentario" not in df:
+        df["Comentario"] = ""
+    for columna in ["Tipo", "Categoría", "Detalle", "Subdetalle", "Forma de pago"]:
+        if columna in df:
+            df[columna] = df[columna].fillna("-").astype(str).str.strip()
+    df["Comentario"] = df["Comentario"].fillna("").astype(str)
+
+    if "Fecha" in df and not pd.api.types.is_datetime64_any_dtype(df["Fecha"]):
+        df["Fecha"] = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
+    return df
+
+
+# Valida todas las filas contra la taxonomía y las formas de pago; devuelve (válidas, errores)
+def validar(df):
+    faltantes = [c for c in COLUMNAS_IMPORTACION if c not in df]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+
+    validas = pd.MultiIndex.from_tuples(combinaciones_validas())
+    combinacion = pd.MultiIndex.from_frame(df[["Tipo", "Categoría", "Detalle", "Subdetalle"]])
+    reglas = [
+        (df["Fecha"].notna(), "Fecha inválida"),
+        (df["Monto"].notna(), "Monto inválido"),
+        (df["Tipo"].isin(["Ingreso", "Egreso"]), "Tipo debe ser Ingreso o Egreso"),
+        (combinacion.isin(validas), "Categoría/Detalle/Subdetalle no existe"),
+        (df["Forma de pago"].isin(formas_pago), "Forma de pago no válida"),
+    ]
+    motivos = pd.Series("", index=df.index)
+    for cumple, motivo in reglas:
+        motivos = motivos.where(cumple, motivos + motivo + "; ")
+
+    ok = motivos == ""
+    errores = df.loc[~ok, COLUMNAS_IMPORTACION].assign(Fila=df.index[~ok] + 2, Motivo=motivos[~ok].str.rstrip("; "))
+    return df.loc[ok, COLUMNAS_IMPORTACION], errores
+
+
+# Identifica la importación de un archivo por un usuario: prefijo de los ids y nombre del archivo de
+# progreso. Dos usuarios que importan el mismo extracto no comparten movimientos ni progreso.
+# quote deja el usuario sin "/" (no válido en ids ni rutas) y sin confundir nombres distintos.
+def clave_importacion(usuario, huella):
+    return f"{quote(usuario, safe='')}_{huella}"
+
+
+# Arma los documentos finales con el mismo formato que "Registrar movimiento"
+def preparar_registros(df, usuario, huella):
+    fecha_registro = datetime.now()
+    df = df.assign(
+        Fecha=df["Fecha"].dt.normalize(),
+        Fecha_Real=calcular_fecha_real(df["Fecha"], df["Tipo"]),
+        Fecha_Registro=fecha_registro,
+        Fecha_Actualizacion=pd.NaT,
+        Usuario=usuario,
+    )
+    # Ids deterministas: que el mismo usuario reimporte el mismo archivo no duplica movimientos
+    clave = clave_importacion(usuario, huella)
+    ids = [f"imp_{clave}_{fila:06d}" for fila in df.index]
+    return list(zip(ids, convertir_df_firebase(df)))
+
+
+def _ruta_progreso(clave, carpeta):
+    return os.path.join(carpeta, f"{clave}.json")
+
+
+# Escribe los movimientos en lotes de hasta 500 escrituras; si se corta, continúa desde el último lote confirmado.
+# clave es la de clave_importacion, la misma con que preparar_registros armó los ids.
+def importar(repositorio, registros, clave, progreso=None, carpeta=CARPETA_PROGRESO):
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = _ruta_progreso(clave, carpeta)
+    confirmados = 0
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            confirmados = json.load(f)["lotes_confirmados"]
+
+    lotes = dividir_en_lotes(registros)
+    escritos = 0
+    for numero, lote in enumerate(lotes):
+        if numero >= confirmados:
+            escritos += len(lote) if repositorio.escribir_lote(lote) else 0
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump({"lotes_confirmados": numero + 1, "total_lotes": len(lotes)}, f)
+        if progreso:
+            progreso(numero + 1, len(lotes))
+    return escritos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa movimientos desde un CSV o Excel a Firebase")
+    parser.add_argument("archivo")
+    parser.add_argument("--credenciales", required=True, help="Ruta al JSON de la cuenta de servicio de Firebase")
+    parser.add_argument("--usuario", required=True)
+    parser.add_argument("--forma-pago", choices=formas_pago, help="Forma de pago si el archivo no la trae")
+    parser.add_argument("--solo-validar", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.archivo, "rb") as f:
+        df, huella = leer_archivo(f.read(), args.archivo)
+    validos, errores = validar(normalizar_columnas(df, args.forma_pago))
+    print(f"{len(validos)} filas válidas, {len(errores)} con errores")
+    for _, error in errores.iterrows():
+        print(f"  fila {error['Fila']}: {error['Motivo']}")
+
+    if not args.solo_validar and not validos.empty:
+        from almacenamiento import RepositorioFirestore
+        from datos import conectar_firestore
+
+        escritos = importar(
+            RepositorioFirestore(conectar_firestore(args.credenciales)),
+            preparar_registros(validos, args.usuario, huella),
+            clave_importacion(args.usuario, huella),
+            progreso=lambda hechos, total: print(f"  lote {hechos}/{total}"),
+        )
+        print(f"Importación terminada: {escritos} movimientos nuevos")
@@ -0,0 +1,82 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from datos import sincronizar, aplicar_cambios
+from esquema import VERSION_ESQUEMA
+
+# Instantánea local en Parquet de los movimientos, con la marca de la última sincronización
+# y el usuario al que pertenecen
+CLAVE_MARCA = b"marca_sync"
+CLAVE_ESQUEMA = b"esquema"
+CLAVE_USUARIO = b"usuario"
+
+
+def leer_instantanea(ruta, usuario=None):
+    if not os.path.exists(ruta):
+        return None
+    tabla = pq.read_table(ruta, memory_map=True)
+    metadatos = tabla.schema.metadata or {}
+    marca = metadatos.get(CLAVE_MARCA, b"").decode()
+    # Una instantánea de otra versión del esquema o de otro usuario se descarta y se carga todo de nuevo
+    if not marca or metadatos.get(CLAVE_ESQUEMA, b"").decode() != VERSION_ESQUEMA:
+        return None
+    if metadatos.get(CLAVE_USUARIO, b"").decode() != (usuario or ""):
+        return None
+    return tabla.to_pandas(self_destruct=True, split_blocks=True), datetime.fromisoformat(marca)
+
+
+# Escribe a un archivo temporal y lo renombra: nunca queda una instantánea a medio escribir
+def guardar_instantanea(df, marca, ruta, usuario=None):
+    carpeta = os.path.dirname(ruta) or "."
+    os.makedirs(carpeta, exist_ok=True)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[CLAVE_MARCA] = marca.isoformat().encode() if marca else b""
+    metadatos[CLAVE_ESQUEMA] = VERSION_ESQUEMA.encode()
+    metadatos[CLAVE_USUARIO] = (usuario or "").encode()
+    tabla = tabla.replace_schema_metadata(metadatos)
+
+    fd, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(tabla, temporal)
+        os.replace(temporal, ruta)
+    except Exception:
+        os.remove(temporal)
+        raise
+
+
+def borrar_instantanea(ruta):
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+# Sincroniza partiendo de lo que hay en memoria o, si no hay nada, de la instantánea en disco.
+# Solo se reescribe la instantánea cuando llegaron cambios. La instantánea es del usuario del
+# repositorio (repositorio.usuario); la de otro usuario no se usa.
+def sincronizar_con_instantanea(repositorio, ruta, df=None, marca=None):
+    if df is None:
+        guardado = leer_instantanea(ruta, repositorio.usuario)
+        if guardado is not None:
+            df, marca = guardado
+
+    return _guardar_si_cambio(df, sincronizar(repositorio, df, marca), ruta, repositorio.usuario)
+
+
+# Aplica cambios ya recibidos (por ejemplo, del listener) y deja la instantánea al día
+def aplicar_con_instantanea(ruta, df, marca, cambiados, eliminados, usuario=None):
+    return _guardar_si_cambio(df, aplicar_cambios(df, marca, cambiados, eliminados), ruta, usuario)
+
+
+def _guardar_si_cambio(df, resultado, ruta, usuario=None):
+    nuevo_df, nueva_marca = resultado
+    if nuevo_df is not df:
+        try:
+            guardar_instantanea(nuevo_df, nueva_marca, ruta, usuario)
+        except Exception as e:
+            print(f"Error al guardar la instantánea: {e}")
+    return nuevo_df, nueva_marca
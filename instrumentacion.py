@@ -0,0 +1,202 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Cada sesión de Streamlit ejecuta el script en su propio hilo: lo medido en una ejecución queda en ese hilo
+_local = threading.local()
+
+
+class Ejecucion:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.tramos = []
+        self.abiertos = {}
+        self.nivel = 0
+        self.leidos = 0
+        self.escritos = 0
+
+
+# Acumulados de todo el proceso, para el archivo de métricas
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.leidos = 0
+        self.escritos = 0
+        self.ejecuciones = 0
+        self.tramos = {}
+
+    def contar(self, leidos=0, escritos=0):
+        with self._lock:
+            self.leidos += leidos
+            self.escritos += escritos
+
+    def contar_ejecucion(self):
+        with self._lock:
+            self.ejecuciones += 1
+
+    def observar(self, nombre, segundos):
+        with self._lock:
+            suma, cantidad = self.tramos.get(nombre, (0.0, 0))
+            self.tramos[nombre] = (suma + segundos, cantidad + 1)
+
+    # Formato de texto de Prometheus (sirve para el textfile collector de node_exporter)
+    def texto(self):
+        with self._lock:
+            lineas = [
+                "# HELP finanzas_documentos_leidos_total Movimientos y filas del resumen leídos del almacenamiento",
+                "# TYPE finanzas_documentos_leidos_total counter",
+                f"finanzas_documentos_leidos_total {self.leidos}",
+                "# HELP finanzas_documentos_escritos_total Movimientos escritos en el almacenamiento",
+                "# TYPE finanzas_documentos_escritos_total counter",
+                f"finanzas_documentos_escritos_total {self.escritos}",
+                "# HELP finanzas_ejecuciones_total Ejecuciones completas del script",
+                "# TYPE finanzas_ejecuciones_total counter",
+                f"finanzas_ejecuciones_total {self.ejecuciones}",
+                "# HELP finanzas_tramo_segundos Duración de los tramos medidos",
+                "# TYPE finanzas_tramo_segundos summary",
+            ]
+            for nombre, (suma, cantidad) in sorted(self.tramos.items()):
+                etiqueta = nombre.replace("\\", "\\\\").replace('"', '\\"')
+                lineas.append(f'finanzas_tramo_segundos_sum{{tramo="{etiqueta}"}} {suma:.6f}')
+                lineas.append(f'finanzas_tramo_segundos_count{{tramo="{etiqueta}"}} {cantidad}')
+        return "\n".join(lineas) + "\n"
+
+
+METRICAS = Metricas()
+
+
+def iniciar_ejecucion():
+    _local.ejecucion = Ejecucion()
+    return _local.ejecucion
+
+
+def ejecucion_actual():
+    return getattr(_local, "ejecucion", None)
+
+
+def _registrar(tramo, segundos):
+    tramo[2] = segundos
+    METRICAS.observar(tramo[0], segundos)
+
+
+# Mide un tramo de código. Los tramos anidados quedan con un nivel más de sangría en el panel.
+@contextmanager
+def medir(nombre):
+    ejecucion = ejecucion_actual()
+    tramo = [nombre, ejecucion.nivel if ejecucion else 0, None]
+    if ejecucion is not None:
+        ejecucion.tramos.append(tramo)
+        ejecucion.nivel += 1
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar(tramo, time.perf_counter() - inicio)
+        if ejecucion is not None:
+            ejecucion.nivel -= 1
+
+
+# Tramo que se cierra solo al terminar la ejecución (p. ej. la sección elegida); lo que sigue queda dentro
+def abrir(nombre):
+    ejecucion = ejecucion_actual()
+    if ejecucion is not None:
+        tramo = [nombre, ejecucion.nivel, None]
+        ejecucion.tramos.append(tramo)
+        ejecucion.abiertos[nombre] = (tramo, time.perf_counter())
+        ejecucion.nivel += 1
+
+
+def contar(leidos=0, escritos=0):
+    ejecucion = ejecucion_actual()
+    if ejecucion is not None:
+        ejecucion.leidos += leidos
+        ejecucion.escritos += escritos
+    METRICAS.contar(leidos, escritos)
+
+
+# Cierra la ejecución y actualiza el archivo de métricas. Si el script se cortó con st.stop()
+# no se llega aquí y la ejecución se descarta en la siguiente.
+def terminar_ejecucion(ruta_metricas=None):
+    ejecucion = ejecucion_actual()
+    if ejecucion is None:
+        return None
+    ahora = time.perf_counter()
+    for tramo, inicio in ejecucion.abiertos.values():
+        _registrar(tramo, ahora - inicio)
+    ejecucion.tramos.insert(0, ["ejecución", -1, None])
+    _registrar(ejecucion.tramos[0], ahora - ejecucion.inicio)
+    METRICAS.contar_ejecucion()
+    _local.ejecucion = None
+
+    if ruta_metricas:
+        try:
+            escribir_metricas(ruta_metricas)
+        except OSError as e:
+            print(f"No se pudo escribir el archivo de métricas: {e}")
+    return ejecucion
+
+
+# Tramos de una ejecución para el panel de diagnóstico. pandas se importa aquí: este módulo
+# se carga antes del ingreso y no debe traerlo.
+def tabla_tramos(ejecucion):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Tramo": ["\u2003" * (nivel + 1) + nombre for nombre, nivel, _ in ejecucion.tramos],
+        "ms": [round(segundos * 1000, 1) for _, _, segundos in ejecucion.tramos],
+    })
+
+
+def escribir_metricas(ruta):
+    carpeta = os.path.dirname(ruta) or "."
+    os.makedirs(carpeta, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(METRICAS.texto())
+    os.replace(temporal, ruta)
+
+
+# Cuántos documentos lee o escribe cada operación del repositorio, según lo que devuelve
+def _documentos(operacion, argumentos, resultado):
+    if operacion in ("cargar_movimientos", "cargar_filtrado", "cargar_resumen"):
+        return len(resultado), 0
+    if operacion == "cargar_cambios":
+        cambiados, eliminados = resultado
+        return len(cambiados) + len(eliminados), 0
+    if operacion == "meses_disponibles":
+        return 2, 0
+    if operacion == "verificar_credenciales":
+        return 1, 0
+    if operacion == "agregar":
+        return 0, 1
+    if operacion in ("actualizar", "eliminar"):
+        return 1, 1
+    if operacion == "escribir_lote":
+        return 1, len(argumentos[0]) if resultado else 0
+    if operacion == "actualizar_lote":
+        return 0, len(argumentos[0])
+    return 0, 0
+
+
+# Envuelve un repositorio de almacenamiento: cada operación queda como tramo y cuenta sus documentos
+class RepositorioInstrumentado:
+    def __init__(self, repositorio):
+        self._repositorio = repositorio
+
+    def de_usuario(self, usuario):
+        return RepositorioInstrumentado(self._repositorio.de_usuario(usuario))
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._repositorio, nombre)
+        if nombre.startswith("_") or not callable(atributo):
+            return atributo
+
+        def operacion(*args, **kwargs):
+            with medir(f"almacenamiento.{nombre}"):
+                resultado = atributo(*args, **kwargs)
+            contar(*_documentos(nombre, args, resultado))
+            return resultado
+
+        return operacion
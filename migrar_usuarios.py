@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from datos import COLECCION, actualizar_lote, proyectar
+
+# Lo que hace falta para saber si un movimiento tiene usuario y para mover su monto en el resumen
+CAMPOS = ["Usuario", "Fecha_Real", "Tipo", "Categoría", "Detalle", "Monto"]
+
+# Cada movimiento asignado es 1 escritura más hasta 2 filas del resumen: 150 x 3 < 500 por commit
+TAMANO_PAGINA = 150
+
+RUTA_PROGRESO = os.path.join(".importaciones", "migracion_usuarios.json")
+
+
+# Las lecturas de la app se limitan al usuario con where("Usuario", "==", ...): un movimiento
+# sin Usuario no lo ve nadie hasta que se le asigna uno
+def sin_usuario(registro):
+    return not registro.get("Usuario")
+
+
+# Una página de movimientos ordenados por id, después del último revisado
+def leer_pagina(db, despues_de=None, tamano=TAMANO_PAGINA):
+    consulta = proyectar(db.collection(COLECCION), CAMPOS).order_by(FieldPath.document_id()).limit(tamano)
+    if despues_de is not None:
+        consulta = consulta.start_after({FieldPath.document_id(): despues_de})
+    return [(doc.id, doc.to_dict()) for doc in consulta.stream()]
+
+
+def leer_progreso(ruta):
+    if not os.path.exists(ruta):
+        return {"ultimo_id": None, "revisados": 0, "asignados": 0}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_progreso(ruta, progreso):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(progreso, f)
+
+
+# Recorre la colección por páginas y asigna el usuario a los movimientos que no tienen, moviendo su
+# monto de la fila "-" del resumen a la del usuario en el mismo commit. Tras cada página se guarda el
+# último id revisado: si se corta, continúa desde ahí; al terminar se borra. Volver a revisar una página no escribe nada,
+# porque lo ya asignado tiene usuario. Fecha_Actualizacion hace que las sesiones abiertas del usuario
+# reciban los movimientos en su próxima sincronización.
+def migrar(db, usuario, ruta_progreso=RUTA_PROGRESO, simular=False, progreso=None):
+    estado = leer_progreso(ruta_progreso)
+    while True:
+        pagina = leer_pagina(db, estado["ultimo_id"])
+        if not pagina:
+            if os.path.exists(ruta_progreso):
+                os.remove(ruta_progreso)
+            return estado
+        cambios = {"Usuario": usuario, "Fecha_Actualizacion": datetime.now()}
+        lote = [(doc_id, registro, cambios) for doc_id, registro in pagina if sin_usuario(registro)]
+        if lote and not simular:
+            actualizar_lote(db, lote)
+        estado["ultimo_id"] = pagina[-1][0]
+        estado["revisados"] += len(pagina)
+        estado["asignados"] += len(lote)
+        if not simular:
+            guardar_progreso(ruta_progreso, estado)
+        if progreso:
+            progreso(estado)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asigna un usuario a los movimientos que no tienen, para que aparezcan en sus consultas")
+    parser.add_argument("--credenciales", required=True, help="Ruta al JSON de la cuenta de servicio de Firebase")
+    parser.add_argument("--usuario", required=True, help="Usuario al que pasan los movimientos sin usuario")
+    parser.add_argument("--progreso", default=RUTA_PROGRESO, help="Archivo con el último id revisado")
+    parser.add_argument("--simular", action="store_true", help="Solo cuenta lo que se asignaría")
+    parser.add_argument("--desde-cero", action="store_true", help="Ignora el progreso guardado")
+    args = parser.parse_args()
+
+    from datos import conectar_firestore
+
+    if args.desde_cero and os.path.exists(args.progreso):
+        os.remove(args.progreso)
+    if args.simular:
+        args.progreso = args.progreso + ".simulacion"
+
+    estado = migrar(
+        conectar_firestore(args.credenciales), args.usuario, args.progreso, args.simular,
+        progreso=lambda e: print(f"  {e['revisados']} revisados, {e['asignados']} sin usuario"),
+    )
+    accion = "se asignarían" if args.simular else "asignados"
+    print(f"Migración terminada: {estado['revisados']} movimientos revisados, {estado['asignados']} {accion} a {args.usuario}")
@@ -0,0 +1,78 @@
+import argparse
+from datetime import datetime
+
+from datos import convertir_df_firebase
+from esquema import a_soles, sin_tipos
+from transformaciones import DIAS_CORTE_INGRESO, calcular_fecha_real
+
+# Lo que hace falta para recalcular Fecha_Real y para mover el monto a su nueva fila del resumen
+COLUMNAS = ["Fecha", "Fecha_Real", "Tipo", "Usuario", "Categoría", "Detalle", "Monto"]
+
+# Cada movimiento corregido es 1 escritura más hasta 2 filas del resumen: 150 x 3 < 500 por commit
+TAMANO_LOTE = 150
+
+
+# Movimientos cuya Fecha_Real guardada no sigue la regla, con la fecha correcta en Fecha_Real_Nueva.
+# Los que no tienen Fecha no se pueden recalcular y se dejan como están.
+def diferencias(df, dias_corte=DIAS_CORTE_INGRESO):
+    nueva = calcular_fecha_real(df["Fecha"], df["Tipo"], dias_corte)
+    actual = df["Fecha_Real"]
+    distinta = nueva.notna() & (actual.isna() | (nueva != actual))
+    return df[distinta].assign(Fecha_Real_Nueva=nueva[distinta]).reset_index(drop=True)
+
+
+# Resumen de la simulación: cuántos movimientos cambian y entre qué meses
+def reporte(df, cambios):
+    lineas = [f"{len(cambios)} de {len(df)} movimientos tienen una Fecha_Real distinta de la regla"]
+    if cambios.empty:
+        return "\n".join(lineas)
+    movidos = cambios.assign(
+        Desde=cambios["Fecha_Real"].dt.strftime("%Y-%m").fillna("(vacío)"),
+        Hasta=cambios["Fecha_Real_Nueva"].dt.strftime("%Y-%m"),
+    ).groupby(["Tipo", "Desde", "Hasta"], observed=True).agg(Movimientos=("id", "size"), Monto=("Monto", "sum"))
+    for (tipo, desde, hasta), fila in movidos.iterrows():
+        lineas.append(f"  {tipo:<8} {desde} -> {hasta}: {fila['Movimientos']} movimientos, S/ {a_soles(fila['Monto']):,.2f}")
+    return "\n".join(lineas)
+
+
+# Corrige Fecha_Real escribiendo solo los movimientos que cambian, por lotes. Se puede volver a
+# ejecutar sin riesgo: lo ya corregido no aparece como diferencia y no se escribe de nuevo.
+# Fecha_Actualizacion hace que las sesiones abiertas reciban el cambio en su próxima sincronización.
+def recalcular(repositorio, cambios, progreso=None):
+    anteriores = convertir_df_firebase(sin_tipos(cambios[COLUMNAS]))
+    ahora = datetime.now()
+    lote = [
+        (doc_id, anterior, {"Fecha_Real": nueva.to_pydatetime(), "Fecha_Actualizacion": ahora})
+        for doc_id, anterior, nueva in zip(cambios["id"], anteriores, cambios["Fecha_Real_Nueva"])
+    ]
+    total = -(-len(lote) // TAMANO_LOTE)
+    for numero, inicio in enumerate(range(0, len(lote), TAMANO_LOTE), start=1):
+        repositorio.actualizar_lote(lote[inicio:inicio + TAMANO_LOTE])
+        if progreso:
+            progreso(numero, total)
+    return len(lote)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcula Fecha_Real de todos los movimientos con la regla del formulario")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--credenciales", help="Ruta al JSON de la cuenta de servicio de Firebase")
+    origen.add_argument("--sqlite", metavar="RUTA", help="Base SQLite local")
+    parser.add_argument("--simular", action="store_true", help="Solo muestra lo que cambiaría")
+    args = parser.parse_args()
+
+    from almacenamiento import RepositorioFirestore, RepositorioSQLite
+    from datos import conectar_firestore
+
+    if args.credenciales:
+        repositorio = RepositorioFirestore(conectar_firestore(args.credenciales))
+    else:
+        repositorio = RepositorioSQLite(args.sqlite)
+
+    df = repositorio.cargar_movimientos(COLUMNAS)
+    cambios = diferencias(df)
+    print(reporte(df, cambios))
+
+    if not args.simular and not cambios.empty:
+        escritos = recalcular(repositorio, cambios, progreso=lambda hechos, total: print(f"  lote {hechos}/{total}"))
+        print(f"Fecha_Real corregida en {escritos} movimientos")
@@ -0,0 +1,24 @@
+import streamlit as st
+
+import instrumentacion
+
+
+# Recursos de todo el proceso. Los módulos pesados se importan recién al crear cada recurso,
+# así la pantalla de ingreso no los carga.
+
+# Almacenamiento según BACKEND en los secrets: firestore (por defecto), sqlite o memoria
+@st.cache_resource
+def obtener_repositorio():
+    from almacenamiento import crear_repositorio
+
+    return instrumentacion.RepositorioInstrumentado(crear_repositorio(st.secrets))
+
+# Cache única por proceso: todas las sesiones comparten los mismos movimientos
+@st.cache_resource
+def obtener_cache():
+    from cache_compartida import CacheCompartida
+
+    return CacheCompartida(
+        ttl=st.secrets.get("CACHE_TTL_SEGUNDOS", 300),
+        max_bytes=st.secrets.get("CACHE_MAX_MB", 512) * 1024 * 1024
+    )
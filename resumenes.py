@@ -0,0 +1,186 @@
+import argparse
+
+import pandas as pd
+from firebase_admin import firestore
+
+from esquema import a_soles
+
+# Resumen mensual: una fila por (Usuario, Mes, Tipo, Categoría, Detalle) con suma y cantidad.
+# La suma se guarda en Centavos enteros, igual que en SQLite: los Increment quedan exactos.
+COLECCION_RESUMEN = "resumen_mensual"
+CAMPOS_CLAVE = ["Usuario", "Mes", "Tipo", "Categoría", "Detalle"]
+
+
+# Campos que identifican la fila del resumen a la que pertenece un movimiento
+def datos_resumen(registro):
+    fecha_real = registro.get("Fecha_Real")
+    if fecha_real is None or pd.isnull(fecha_real):
+        return None
+    periodo = pd.Timestamp(fecha_real).tz_localize(None).to_period("M")
+    return {
+        "Usuario": registro.get("Usuario") or "-",
+        "Mes": str(periodo),
+        "Fecha_Real": periodo.start_time.to_pydatetime(),
+        "Tipo": registro.get("Tipo") or "-",
+        "Categoría": registro.get("Categoría") or "-",
+        "Detalle": registro.get("Detalle") or "-",
+    }
+
+
+def id_resumen(datos):
+    return "|".join(str(datos[campo]) for campo in CAMPOS_CLAVE).replace("/", "_")
+
+
+# Monto de un movimiento (en soles) en centavos enteros
+def _centavos(registro):
+    monto = registro.get("Monto")
+    return 0 if monto is None or pd.isnull(monto) else int(round(float(monto) * 100))
+
+
+# Suma (signo=1) o resta (signo=-1) un movimiento de su fila del resumen dentro de un batch o transacción
+def sumar_al_resumen(escritor, db, registro, signo=1):
+    datos = datos_resumen(registro)
+    if datos is None:
+        return
+    ref = db.collection(COLECCION_RESUMEN).document(id_resumen(datos))
+    escritor.set(ref, {
+        **datos,
+        "Centavos": firestore.Increment(signo * _centavos(registro)),
+        "Cantidad": firestore.Increment(signo),
+    }, merge=True)
+
+
+def _acumular(acumulado, registro, signo):
+    datos = datos_resumen(registro)
+    if datos is None:
+        return
+    fila = acumulado.setdefault(id_resumen(datos), [datos, 0, 0])
+    fila[1] += signo * _centavos(registro)
+    fila[2] += signo
+
+
+def _escribir_acumulado(escritor, db, acumulado):
+    for doc_id, (datos, centavos, cantidad) in acumulado.items():
+        if centavos == 0 and cantidad == 0:
+            continue
+        escritor.set(db.collection(COLECCION_RESUMEN).document(doc_id), {
+            **datos,
+            "Centavos": firestore.Increment(centavos),
+            "Cantidad": firestore.Increment(cantidad),
+        }, merge=True)
+
+
+# Suma muchos movimientos al resumen con una sola escritura por fila del resumen
+def sumar_lote_al_resumen(escritor, db, registros):
+    acumulado = {}
+    for registro in registros:
+        _acumular(acumulado, registro, 1)
+    _escribir_acumulado(escritor, db, acumulado)
+
+
+# Pasa muchos movimientos de su fila anterior a la nueva, (anterior, nuevo) por movimiento.
+# Se escribe solo la diferencia neta de cada fila del resumen.
+def mover_lote_en_resumen(escritor, db, pares):
+    acumulado = {}
+    for anterior, nuevo in pares:
+        _acumular(acumulado, anterior, -1)
+        _acumular(acumulado, nuevo, 1)
+    _escribir_acumulado(escritor, db, acumulado)
+
+
+# Columnas del resumen que devuelven los repositorios (Monto en soles)
+COLUMNAS_RESUMEN = CAMPOS_CLAVE + ["Fecha_Real", "Monto", "Cantidad"]
+
+
+# Columnas pedidas más Cantidad, que siempre hace falta para descartar las filas vacías
+def columnas_resumen(columnas=None):
+    if columnas is None:
+        return COLUMNAS_RESUMEN
+    return [c for c in COLUMNAS_RESUMEN if c in columnas or c == "Cantidad"]
+
+
+# Carga las filas del resumen aplicando los mismos filtros que los movimientos.
+# Con desde/hasta trae solo esos meses, del más reciente hacia atrás: el cursor start_after(hasta)
+# sobre Fecha_Real descendente más el límite inferior desde (índices en firestore.indexes.json).
+# Las filas escritas antes de pasar a centavos guardan Monto en soles; se suman a Centavos hasta
+# que reconstruir_resumen las reescriba.
+def cargar_resumen(db, tipos=None, categoria=None, columnas=None, desde=None, hasta=None, usuario=None):
+    from datos import construir_consulta, proyectar
+
+    consulta = construir_consulta(db, tipos, categoria, desde=desde, coleccion=COLECCION_RESUMEN, usuario=usuario)
+    if hasta is not None:
+        consulta = consulta.order_by("Fecha_Real", direction="DESCENDING").start_after({"Fecha_Real": hasta})
+    campos = columnas_resumen(columnas)
+    leidos = campos + ["Centavos"] if "Monto" in campos else campos
+    if columnas is not None:
+        consulta = proyectar(consulta, leidos)
+    filas = [doc.to_dict() for doc in consulta.stream()]
+    df = pd.DataFrame(filas, columns=leidos)
+    if "Monto" in campos:
+        anteriores = pd.to_numeric(df["Monto"], errors="coerce").fillna(0)
+        centavos = pd.to_numeric(df.pop("Centavos"), errors="coerce").fillna(0)
+        df["Monto"] = a_soles(centavos + (anteriores * 100).round())
+    if "Fecha_Real" in df:
+        df["Fecha_Real"] = pd.to_datetime(df["Fecha_Real"], errors="coerce", utc=True).dt.tz_localize(None)
+    return df[df["Cantidad"] > 0].reset_index(drop=True)
+
+
+# Sumas del resumen en Centavos a partir de los movimientos (Monto en centavos, textos categóricos).
+# Se agrupa por los códigos de los categóricos y los vacíos pasan a "-" ya en las filas del resumen.
+def sumar_resumen(df):
+    base = df.dropna(subset=["Fecha_Real"])
+    base = base.assign(Mes=base["Fecha_Real"].dt.strftime("%Y-%m"))
+    resumen = base.groupby(CAMPOS_CLAVE, observed=True, dropna=False, as_index=False).agg(
+        Centavos=("Monto", "sum"), Cantidad=("Monto", "size")
+    )
+    for campo in CAMPOS_CLAVE:
+        resumen[campo] = resumen[campo].astype(object).fillna("-")
+    resumen = resumen.groupby(CAMPOS_CLAVE, as_index=False)[["Centavos", "Cantidad"]].sum()
+    resumen["Fecha_Real"] = pd.to_datetime(resumen["Mes"], format="%Y-%m")
+    return resumen
+
+
+# El resumen completo con Monto en soles, como lo devuelven los repositorios
+def calcular_resumen(df):
+    resumen = sumar_resumen(df)
+    resumen["Monto"] = a_soles(resumen.pop("Centavos"))
+    return resumen
+
+
+# Recalcula el resumen desde todo el historial: sobrescribe las filas y borra las que sobran.
+# Las filas que aún guardan Monto en soles quedan reescritas en Centavos. Conviene ejecutarlo sin usuarios registrando movimientos al mismo tiempo.
+def reconstruir_resumen(db):
+    from datos import cargar_datos
+
+    resumen = sumar_resumen(cargar_datos(db, ["Usuario", "Fecha_Real", "Tipo", "Categoría", "Detalle", "Monto"]))
+    coleccion = db.collection(COLECCION_RESUMEN)
+    nuevos = {}
+    for fila in resumen.to_dict("records"):
+        fila["Fecha_Real"] = fila["Fecha_Real"].to_pydatetime()
+        fila["Centavos"] = int(fila["Centavos"])
+        fila["Cantidad"] = int(fila["Cantidad"])
+        nuevos[id_resumen(fila)] = fila
+    sobrantes = [doc.id for doc in coleccion.select([]).stream() if doc.id not in nuevos]
+
+    operaciones = [("set", doc_id, fila) for doc_id, fila in nuevos.items()]
+    operaciones += [("delete", doc_id, None) for doc_id in sobrantes]
+    for inicio in range(0, len(operaciones), 500):
+        batch = db.batch()
+        for operacion, doc_id, fila in operaciones[inicio:inicio + 500]:
+            if operacion == "set":
+                batch.set(coleccion.document(doc_id), fila)
+            else:
+                batch.delete(coleccion.document(doc_id))
+        batch.commit()
+    return len(nuevos), len(sobrantes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye la colección resumen_mensual desde los movimientos")
+    parser.add_argument("--credenciales", required=True, help="Ruta al JSON de la cuenta de servicio de Firebase")
+    args = parser.parse_args()
+
+    from datos import conectar_firestore
+
+    filas, borradas = reconstruir_resumen(conectar_firestore(args.credenciales))
+    print(f"Resumen reconstruido: {filas} filas escritas, {borradas} filas borradas")
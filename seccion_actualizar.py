@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import streamlit as st
+
+from catalogos import formas_pago
+from consultas import repositorio, cola, escribir_movimiento, obtener_movimientos
+from esquema import a_soles
+from tablas import mostrar_tabla_paginada
+from transformaciones import fecha_real_movimiento
+
+
+def mostrar():
+    st.subheader("🖉 Editar o eliminar registros existentes")
+    
+    df = obtener_movimientos().sort_values("Fecha_Registro", ascending=False).reset_index(drop=True)
+
+    if df.empty:
+        st.info("No hay registros para actualizar.")
+        st.stop()
+
+    # Seleccionar índice visible para edición
+    seleccion = st.selectbox("Selecciona un registro para editar o eliminar", df.index)
+    seleccionado = df.loc[seleccion]
+
+    # Mostrar formulario para editar
+    with st.form("edit_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            tipo = st.selectbox("Tipo", ["Ingreso", "Egreso"], index=["Ingreso", "Egreso"].index(seleccionado["Tipo"]))
+            categoria = st.text_input("Categoría", seleccionado["Categoría"])
+            detalle = st.text_input("Detalle", seleccionado["Detalle"])
+            subdetalle = st.text_input("Subdetalle", seleccionado["Subdetalle"])
+        with col2:
+            forma_pago = st.selectbox("Forma de pago", formas_pago, index=formas_pago.index(seleccionado["Forma de pago"]))
+            monto = st.number_input("Monto (S/.)", value=float(a_soles(seleccionado["Monto"])))
+            fecha = st.date_input("Fecha", value=seleccionado["Fecha"].date())
+            comentario = st.text_input("Comentario", seleccionado["Comentario"])
+
+        guardar = st.form_submit_button("Guardar cambios")
+        eliminar = st.form_submit_button("Eliminar registro")
+
+    doc_id = seleccionado.get("id", None)
+    if not doc_id:
+        st.error("Error: El registro seleccionado no tiene un ID válido.")
+        st.stop()
+
+    # Un movimiento que sigue en la cola de escritura todavía no existe en el almacenamiento
+    if (guardar or eliminar) and cola and cola.pendiente(doc_id):
+        st.warning("⏳ Este movimiento todavía se está guardando; vuelve a intentarlo en unos segundos.")
+        st.stop()
+
+    if guardar:
+        fecha_real = fecha_real_movimiento(fecha, tipo)
+
+        actualizado = {
+            "Fecha": datetime.combine(fecha, datetime.min.time()),
+            "Fecha_Actualizacion": datetime.now(),
+            "Fecha_Real": datetime.combine(fecha_real, datetime.min.time()),
+            "Tipo": tipo,
+            "Categoría": categoria,
+            "Detalle": detalle,
+            "Subdetalle": subdetalle,
+            "Forma de pago": forma_pago,
+            "Monto": monto,
+            "Comentario": comentario,
+            "Usuario": st.session_state["usuario_actual"]
+        }
+        try:
+            escribir_movimiento(doc_id, lambda: repositorio.actualizar(doc_id, actualizado), actualizado)
+        except Exception as e:
+            st.error(f"No se pudo actualizar el registro: {e}")
+            st.stop()
+        st.success("✅ Registro actualizado correctamente")
+        st.rerun()
+
+    if eliminar:
+        try:
+            escribir_movimiento(doc_id, lambda: repositorio.eliminar(doc_id))
+        except Exception as e:
+            st.error(f"No se pudo eliminar el registro: {e}")
+            st.stop()
+        st.success("✅ Registro eliminado correctamente")
+        st.rerun()
+            
+    st.markdown("---")
+    mostrar_tabla_paginada(df, ["Tipo", "Fecha_Real", "Fecha", "Categoría", "Monto", "Detalle", "Subdetalle", "Usuario", "Forma de pago", "Comentario"], "tabla_registros")
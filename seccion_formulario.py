@@ -0,0 +1,147 @@
+from datetime import date, datetime
+
+import streamlit as st
+
+from catalogos import ingresos, egresos, formas_pago
+from consultas import repositorio, cola, escribir_movimiento, obtener_meses, obtener_filtrados
+from tablas import mostrar_tabla_paginada
+from transformaciones import etiqueta_mes, fecha_real_movimiento
+
+# Columnas que usa esta sección: las consultas traen solo esas (proyección de campos en Firebase)
+COLUMNAS_FORMULARIO = ["Fecha_Real", "Tipo", "Categoría", "Detalle", "Subdetalle", "Forma de pago", "Monto", "Comentario"]
+
+
+def mostrar():
+    formulario()
+    movimientos_registrados()
+
+
+# Formulario de registro como fragmento: escribir el comentario o cambiar la categoría solo
+# vuelve a ejecutar el formulario, no la página ni la tabla de movimientos
+@st.fragment
+def formulario():
+    tipo = st.radio("Selecciona el tipo de movimiento", ["Ingreso", "Egreso"])
+    detalle = "-"
+    subdetalle = "-"
+    fecha_registro = datetime.now()
+    if tipo == "Ingreso":
+        categoria = st.selectbox("Categoría de ingreso", list(ingresos.keys()))
+        fecha = st.date_input("Fecha", value=date.today())
+        fecha_real = fecha_real_movimiento(fecha, tipo)
+        
+        if categoria in ["Vivienda", "Servicios"]:
+            tipos_ingreso = list(ingresos[categoria].keys())
+            tipo_ingreso = st.selectbox("Tipo", tipos_ingreso) if tipos_ingreso else "-"
+            detalle_lista = ingresos[categoria][tipo_ingreso] if tipo_ingreso else []
+            subdetalle = st.selectbox("Detalle", detalle_lista) if detalle_lista else "-"
+            detalle = tipo_ingreso
+        else:
+            tipos_ingreso = list(ingresos[categoria].keys())
+            subdetalle = st.selectbox("Tipo", tipos_ingreso) if tipos_ingreso else "-"
+            detalle = "-"
+    else:
+        categoria = st.selectbox("Categoría de egreso", list(egresos.keys()))
+        tipos_egreso = list(egresos[categoria].keys())
+        tipo_egreso = st.selectbox("Tipo", tipos_egreso) if tipos_egreso else "-"
+        detalle_lista = egresos[categoria][tipo_egreso] if tipo_egreso else []
+        subdetalle = st.selectbox("Detalle", detalle_lista) if detalle_lista else "-"
+        detalle = tipo_egreso
+        fecha = st.date_input("Fecha", value=date.today())
+        fecha_real = fecha
+
+    forma_pago = st.selectbox("Forma de pago", formas_pago)
+    monto = st.number_input("Monto (S/.)", min_value=0.0, format="%.2f")
+    comentario = st.text_input("Comentario")
+    
+    if st.button("Registrar movimiento"):
+        nuevo = {
+            "Fecha": datetime.combine(fecha, datetime.min.time()),
+            "Fecha_Registro": fecha_registro,
+            "Fecha_Real": datetime.combine(fecha_real, datetime.min.time()),
+            "Fecha_Actualizacion": None,
+            "Tipo": tipo,
+            "Categoría": categoria,
+            "Detalle": detalle,
+            "Subdetalle": subdetalle,
+            "Forma de pago": forma_pago,
+            "Monto": monto,
+            "Comentario": comentario,
+            "Usuario": st.session_state["usuario_actual"]
+        }
+        doc_id = repositorio.nuevo_id()
+        # Con la cola el movimiento queda en disco al instante y se escribe en segundo plano
+        escribir = (lambda: cola.encolar(doc_id, nuevo)) if cola else (lambda: repositorio.agregar(nuevo, doc_id))
+        try:
+            escribir_movimiento(doc_id, escribir, nuevo)
+        except Exception as e:
+            st.error(f"No se pudo registrar el movimiento: {e}")
+        else:
+            # La tabla está fuera del fragmento: se vuelve a ejecutar la página para que lo muestre
+            st.session_state["movimiento_registrado"] = True
+            st.session_state.setdefault("registrados", []).append(doc_id)
+            st.rerun()
+    if st.session_state.pop("movimiento_registrado", False):
+        st.success("✅ Movimiento registrado correctamente")
+    if cola:
+        mostrar_estado_cola(st.session_state.get("registrados", []))
+
+
+# Últimos movimientos registrados en esta sesión: pendientes en la cola, ya guardados o con un
+# error que no se arregla reintentando. Cuando la cola confirma o descarta un lote las sesiones se
+# redibujan y el estado se actualiza solo.
+def mostrar_estado_cola(ids):
+    ultimos = ids[-10:]
+    estados = cola.estados(ultimos)
+    if not estados:
+        return
+    etiquetas = {"pendiente": "⏳ Pendiente", "confirmado": "✅ Guardado", "error": "❌ No se guardó"}
+    filas = [
+        {
+            "Estado": etiquetas[estado],
+            "Fecha": registro["Fecha"].date(),
+            "Tipo": registro["Tipo"],
+            "Categoría": registro["Categoría"],
+            "Monto": registro["Monto"],
+            "Comentario": registro["Comentario"],
+            "Error": error or "",
+        }
+        for estado, registro, error in (estados[doc_id] for doc_id in reversed(ultimos) if doc_id in estados)
+    ]
+    fallidos = sum(estado == "error" for estado, _, _ in estados.values())
+    if fallidos:
+        st.error(f"❌ {fallidos} movimientos no se pudieron guardar y no se reintentarán; vuelve a registrarlos")
+    pendientes = sum(estado == "pendiente" for estado, _, _ in estados.values())
+    if pendientes and cola.ultimo_error:
+        st.warning(f"⏳ {pendientes} movimientos esperan conexión con el almacenamiento; se reintenta solo ({cola.ultimo_error})")
+    st.dataframe(filas, column_config={"Monto": st.column_config.NumberColumn(format="%.2f")},
+                 hide_index=True, use_container_width=True)
+
+
+# Filtros y tabla de movimientos: cambiar un filtro solo vuelve a ejecutar este bloque
+# y cambiar de página u orden solo la tabla, que también es un fragmento
+@st.fragment
+def movimientos_registrados():
+    meses = obtener_meses()
+    if meses:
+        # Filtros interactivos
+        colf1, colf2, colf3 = st.columns(3)
+        with colf1:
+            mes_seleccionado = st.selectbox("📅 Filtrar por mes", ["Todos"] + meses, index=0,
+                                            format_func=lambda m: m if m == "Todos" else etiqueta_mes(m))
+        with colf2:
+            tipo_seleccionado = st.selectbox("🔁 Filtrar por tipo", ["Todos", "Ingreso", "Egreso"], index=0)
+        with colf3:
+            categoria_seleccionada = st.selectbox("📂 Filtrar por categoría", ["Todos"] + sorted(set(ingresos) | set(egresos)), index=0)
+    
+        # Aplicar filtros en la consulta a Firebase: solo viajan los documentos que coinciden
+        df_filtrado = obtener_filtrados(
+            tipos=[tipo_seleccionado] if tipo_seleccionado != "Todos" else None,
+            categoria=categoria_seleccionada if categoria_seleccionada != "Todos" else None,
+            mes=mes_seleccionado if mes_seleccionado != "Todos" else None,
+            columnas=COLUMNAS_FORMULARIO + ["Fecha_Registro"]  # para ordenar por "Más recientes"
+        )
+    
+        st.markdown("---")
+        st.subheader("📊 Movimientos registrados")
+    
+        mostrar_tabla_paginada(df_filtrado, COLUMNAS_FORMULARIO, "tabla_movimientos", orden_defecto="Fecha_Real")
@@ -0,0 +1,41 @@
+import streamlit as st
+
+from catalogos import formas_pago
+from consultas import repositorio, sincronizar_movimientos
+from importacion import leer_archivo, normalizar_columnas, validar, preparar_registros, importar, clave_importacion
+
+
+def mostrar():
+    st.subheader("📥 Importar movimientos desde CSV o Excel")
+    archivo = st.file_uploader("Extracto del banco o plantilla", type=["csv", "xlsx"])
+    forma_pago_defecto = st.selectbox("Forma de pago (si el archivo no la trae)", formas_pago)
+
+    if archivo is not None:
+        try:
+            df_archivo, huella = leer_archivo(archivo.getvalue(), archivo.name)
+            validos, errores = validar(normalizar_columnas(df_archivo, forma_pago_defecto))
+        except (ValueError, ImportError) as e:
+            st.error(f"No se pudo leer el archivo: {e}")
+            st.stop()
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric("✅ Filas válidas", len(validos))
+        with c2:
+            st.metric("⚠️ Filas con errores", len(errores))
+        if not errores.empty:
+            st.dataframe(errores[["Fila", "Motivo"] + list(errores.columns[:-2])], use_container_width=True, hide_index=True)
+
+        if not validos.empty and st.button(f"Importar {len(validos)} movimientos"):
+            barra = st.progress(0.0, text="Importando...")
+            try:
+                usuario = st.session_state["usuario_actual"]
+                escritos = importar(
+                    repositorio, preparar_registros(validos, usuario, huella), clave_importacion(usuario, huella),
+                    progreso=lambda hechos, total: barra.progress(hechos / total, text=f"Lote {hechos} de {total}")
+                )
+                st.success(f"✅ {escritos} movimientos importados")
+            except Exception as e:
+                st.error(f"La importación se detuvo: {e}. Vuelve a pulsar Importar para continuar desde el último lote confirmado.")
+            finally:
+                sincronizar_movimientos()
@@ -0,0 +1,155 @@
+import plotly.io as pio
+import streamlit as st
+
+import agregaciones
+import graficos
+import instrumentacion
+from catalogos import ingresos, egresos
+from consultas import obtener_meses, obtener_resumen, obtener_cubo, obtener_figura
+from transformaciones import ventanas_de_meses, ventanas_necesarias
+
+# Tema oscuro para Plotly
+pio.templates.default = "plotly_dark"
+
+# Columnas que usa esta sección: las consultas traen solo esas (proyección de campos en Firebase)
+COLUMNAS_VISUALIZACION = ["Fecha_Real", "Tipo", "Categoría", "Detalle", "Monto"]
+
+# Meses que trae el tablero por vez: los más recientes al entrar, los anteriores a pedido
+VENTANA_MESES = st.secrets.get("VENTANA_MESES", 12)
+
+# Suma una ventana de meses anteriores al tablero y la deja seleccionada en el filtro de periodo
+def cargar_meses_anteriores(meses):
+    st.session_state["ventanas_tablero"] += 1
+    primero = ventanas_de_meses(meses, st.session_state["ventanas_tablero"], VENTANA_MESES)[-1][0]
+    seleccion = set(st.session_state.get("periodos_tablero", []))
+    st.session_state["periodos_tablero"] = sorted(seleccion | {m for m in meses if m >= primero})
+
+# st.plotly_chart medido: ahí se serializa la figura y se envía al navegador
+def mostrar_grafico(fig):
+    with instrumentacion.medir("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# El tablero es un fragmento: los filtros solo vuelven a ejecutar los indicadores y gráficos,
+# que dependen todos de ellos, y no el resto de la página
+@st.fragment
+def mostrar():
+    st.subheader("📈 Indicadores Generales")
+    colf1, colf2, colf3 = st.columns(3)
+    with colf1:
+        tipos_seleccionados = st.multiselect("🔁 Filtrar por tipo", ["Ingreso", "Egreso", "Ahorros"], default=["Ingreso", "Egreso"])
+    with colf3:
+        categorias = ["Todas"] + sorted(set(ingresos) | set(egresos))
+        filtro_categoria = st.selectbox("Filtrar por categoría", categorias)
+
+    # Solo se cargan las ventanas de meses que se ven: la más reciente al entrar y las anteriores
+    # cuando se piden con el botón o se elige un mes más antiguo en el filtro de periodo.
+    meses_todos = obtener_meses()
+    st.session_state["ventanas_tablero"] = max(
+        st.session_state.get("ventanas_tablero", 1),
+        ventanas_necesarias(meses_todos, st.session_state.get("periodos_tablero", []), VENTANA_MESES)
+    )
+    ventanas = ventanas_de_meses(meses_todos, st.session_state["ventanas_tablero"], VENTANA_MESES) or [(None, None)]
+    cargados = [m for m in meses_todos if m >= ventanas[-1][0]]
+
+    # Tipo y categoría se filtran en la consulta a Firebase (los ahorros son egresos).
+    # Los indicadores y gráficos leen el resumen mensual, no cada movimiento.
+    tipos_consulta = [t for t in ["Ingreso", "Egreso"] if t in tipos_seleccionados or (t == "Egreso" and "Ahorros" in tipos_seleccionados)]
+    filtros_consulta = dict(
+        tipos=tipos_consulta if len(tipos_consulta) == 1 else None,
+        categoria=filtro_categoria if filtro_categoria != "Todas" else None,
+        columnas=COLUMNAS_VISUALIZACION,
+        ventanas=tuple(ventanas)
+    )
+    df = obtener_resumen(**filtros_consulta)
+
+    # Sin meses disponibles no hay filtro de periodo y los cortes usan los meses cargados
+    fechas_seleccionadas = cargados
+    if meses_todos:
+        with colf2:
+            # Mientras no se toque el filtro, sigue mostrando todos los meses cargados
+            seleccion = st.session_state.get("periodos_tablero")
+            if seleccion is None or seleccion == st.session_state.get("periodos_cargados"):
+                seleccion = cargados
+            st.session_state["periodos_tablero"] = [m for m in seleccion if m in meses_todos]
+            st.session_state["periodos_cargados"] = cargados
+            fechas_seleccionadas = st.multiselect("📅 Filtrar por periodo (YYYY-MM)", meses_todos, key="periodos_tablero")
+            st.button("⏪ Cargar meses anteriores", on_click=cargar_meses_anteriores, args=(meses_todos,),
+                      disabled=len(cargados) == len(meses_todos))
+
+    if not df.empty:
+        filtro_subdetalle = "Todas"
+        if filtro_categoria != "Todas":
+            subcategorias = ["Todas"] + sorted(df["Detalle"].dropna().unique())
+            filtro_subdetalle = st.selectbox("📂 Filtrar por subcategoría", subcategorias)
+
+        # Un solo cubo Mes × Tipo × Categoría × Detalle; cada indicador y gráfico es un corte de él
+        subdetalle = filtro_subdetalle if filtro_subdetalle != "Todas" else None
+        cubo = obtener_cubo(df, **filtros_consulta, tipos_seleccionados=tipos_seleccionados, subdetalle=subdetalle)
+        resumen = agregaciones.totales(cubo, fechas_seleccionadas, tipos_seleccionados)
+
+        c1, c2 = st.columns(2)
+        with c1:
+            st.metric("💚 Ingresos", f"S/ {resumen['ingresos']:,.2f}")
+            st.metric("❤️ Egresos", f"S/ {resumen['egresos']:,.2f}")
+            st.metric("🔄 Variación", f"S/ {resumen['variacion']:,.2f}", delta=f"{resumen['porcentaje']:.1f}%")
+        with c2:
+            st.metric("💰 Ahorros", f"S/ {resumen['ahorros']:,.2f}")
+
+        # Cada figura se arma una vez por versión de los datos y estado de los filtros
+        def figura(nombre, construir):
+            return obtener_figura(nombre, construir, fechas_seleccionadas, **filtros_consulta,
+                                  tipos_seleccionados=tipos_seleccionados, subdetalle=subdetalle)
+
+        st.markdown("---")
+        fig = figura("evolutivo", lambda: graficos.figura_evolutivo(agregaciones.por_mes_tipo(cubo)))
+        mostrar_grafico(fig)
+
+        st.markdown("---")
+        st.subheader("📊 Distribución por Categoría")
+        fig_cat = figura("categorias", lambda: graficos.figura_categorias(agregaciones.por_categoria(cubo, fechas_seleccionadas)))
+        mostrar_grafico(fig_cat)
+        
+        #fig_cat = px.bar(df_categoria, x="Categoría", y="Monto", color="Tipo", barmode="group",
+        #                 title="Distribución de Montos por Categoría",
+        #                color_discrete_map={
+        #                    "Ingreso": "#0cb7f2",  # Morado
+        #                    "Egreso": "#ff69b4"    # Rosado tenue
+        #                })
+        # st.plotly_chart(fig_cat, use_container_width=True)
+        
+        st.markdown("---")
+        st.subheader("📊 Variación Mensual")
+        fig_var_mes = figura("variacion_mensual", lambda: graficos.figura_variacion_mensual(agregaciones.variacion_mensual(cubo)))
+        mostrar_grafico(fig_var_mes)
+
+        st.markdown("---")
+        st.subheader("📊 Variación total por Categoría")
+        fig_var_cat = figura("variacion_categoria", lambda: graficos.figura_variacion_categoria(
+            agregaciones.variacion_por_categoria(cubo, fechas_seleccionadas)))
+        mostrar_grafico(fig_var_cat)
+        #fig_var_cat = px.bar(df_cat, x="Categoría", y="Variación", color="Color", barmode="group",
+        #                     title="Variación total por categoría", color_discrete_map={
+        #                         "Positiva": "lightgreen",
+        #                         "Negativa": "red"
+        #                     })
+        #st.plotly_chart(fig_var_cat, use_container_width=True)
+
+        if filtro_categoria == "Vivienda":
+            st.markdown("---")
+            st.subheader("📊 Comparativa Ingresos vs Egresos en Vivienda")
+            fig = figura("vivienda", lambda: graficos.figura_vivienda(agregaciones.por_detalle(cubo, fechas_seleccionadas, "Vivienda")))
+
+            # st.plotly_chart(fig_viv, use_container_width=True)
+            mostrar_grafico(fig)
+            
+        if filtro_categoria == "Servicios":
+            st.markdown("---")
+            st.subheader("📊 Comparativa Ingresos vs Egresos en Servicios")
+            fig_viv = figura("servicios", lambda: graficos.figura_servicios(agregaciones.por_detalle(cubo, fechas_seleccionadas, "Servicios")))
+            mostrar_grafico(fig_viv)
+            
+        
+            
+    else:
+        st.info("🔄 Aún no has registrado movimientos para visualizar.")
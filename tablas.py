@@ -0,0 +1,54 @@
+import numpy as np
+import streamlit as st
+
+from esquema import a_soles
+
+
+# Colores de la columna Tipo, calculados de una vez para toda la columna
+def color_columna_tipo(columna):
+    return np.where(columna == "Ingreso", "background-color: #d4edda; color: green;",
+                    np.where(columna == "Egreso", "background-color: #f8d7da; color: red;", ""))
+
+
+# Tabla paginada: ordena en el servidor y solo envía al navegador la página visible.
+# Es un fragmento: cambiar de página u orden no vuelve a ejecutar la sección.
+# "Más recientes" solo se ofrece si df trae Fecha_Registro, aunque no esté entre las columnas mostradas.
+@st.fragment
+def mostrar_tabla_paginada(df, columnas, clave, orden_defecto=None):
+    opciones_orden = ([None] if "Fecha_Registro" in df else []) + columnas
+    if orden_defecto not in opciones_orden:
+        orden_defecto = opciones_orden[0]
+    colp1, colp2, colp3, colp4 = st.columns(4)
+    with colp1:
+        orden = st.selectbox("Ordenar por", opciones_orden, index=opciones_orden.index(orden_defecto),
+                             format_func=lambda c: "Más recientes" if c is None else c, key=f"{clave}_orden")
+    with colp2:
+        descendente = st.toggle("Descendente", value=True, key=f"{clave}_desc", disabled=orden is None)
+    with colp3:
+        filas_defecto = int(st.secrets.get("FILAS_POR_PAGINA", 50))
+        opciones_filas = sorted({25, 50, 100, 200, filas_defecto})
+        filas_pagina = st.selectbox("Filas por página", opciones_filas,
+                                    index=opciones_filas.index(filas_defecto), key=f"{clave}_filas")
+    total_paginas = max(1, (len(df) + filas_pagina - 1) // filas_pagina)
+    if st.session_state.get(f"{clave}_pagina", 1) > total_paginas:
+        st.session_state[f"{clave}_pagina"] = total_paginas
+    with colp4:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key=f"{clave}_pagina")
+
+    # Se ordena solo la columna elegida y se copian únicamente las filas de la página.
+    # "Más recientes" es lo último registrado primero (Fecha_Registro descendente).
+    inicio = (pagina - 1) * filas_pagina
+    if orden is None:
+        orden, descendente = "Fecha_Registro", True
+    indices = df[orden].sort_values(ascending=not descendente, na_position="last", kind="stable").index
+    visibles = df.loc[indices[inicio:inicio + filas_pagina], columnas]
+    # Monto se guarda en centavos; solo la página visible pasa a soles
+    if "Monto" in visibles:
+        visibles = visibles.assign(Monto=a_soles(visibles["Monto"]))
+
+    st.dataframe(
+        visibles.style.apply(color_columna_tipo, subset=["Tipo"]),
+        column_config={"Monto": st.column_config.NumberColumn(format="%.2f")},
+        use_container_width=True
+    )
+    st.caption(f"Mostrando {min(inicio + 1, len(df))}–{min(inicio + filas_pagina, len(df))} de {len(df)} movimientos")
@@ -0,0 +1,209 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from google.api_core import exceptions
+
+import datos
+from almacenamiento import Repositorio, RepositorioMemoria, RepositorioSQLite
+from cache_compartida import CacheCompartida
+from cola_escritura import ColaEscritura
+
+
+def movimiento(usuario="ana", registrado=None, **cambios):
+    fecha = datetime(2026, 3, 1)
+    return {
+        "Fecha": fecha, "Fecha_Registro": registrado or datetime.now(), "Fecha_Real": fecha,
+        "Fecha_Actualizacion": None, "Tipo": "Egreso", "Categoría": "Alimentos", "Detalle": "Carne",
+        "Subdetalle": "-", "Forma de pago": "BCP", "Monto": 12.5, "Comentario": "", "Usuario": usuario,
+        **cambios,
+    }
+
+
+# Espera a que se cumpla una condición que depende del hilo de la cola
+def esperar(condicion, limite=5):
+    fin = time.monotonic() + limite
+    while not condicion():
+        if time.monotonic() > fin:
+            raise AssertionError("la condición no se cumplió a tiempo")
+        time.sleep(0.02)
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def repositorio(request, tmp_path):
+    if request.param == "memoria":
+        return RepositorioMemoria({"ana": "x"})
+    return RepositorioSQLite(str(tmp_path / "finanzas.db"))
+
+
+def test_motor_incompleto_falla_al_crearlo():
+    class SinOperaciones(Repositorio):
+        def cargar_movimientos(self, columnas=None):
+            return None
+
+    with pytest.raises(TypeError):
+        SinOperaciones()
+
+
+# La sincronización trae lo creado, actualizado y eliminado desde la marca, sin volver a cargar todo
+def test_sincronizar_trae_solo_los_cambios(repositorio):
+    hace_un_dia = datetime.now() - timedelta(days=1)
+    for i in range(3):
+        repositorio.agregar(movimiento(registrado=hace_un_dia), f"m{i}")
+    df, marca = datos.sincronizar(repositorio, None, None)
+    assert len(df) == 3
+
+    repositorio.agregar(movimiento(), "nuevo")
+    repositorio.actualizar("m0", {"Monto": 1.0, "Fecha_Actualizacion": datetime.now()})
+    repositorio.eliminar("m1")
+    cambiados, eliminados = repositorio.cargar_cambios(marca)
+    # Lo registrado hasta MARGEN_SINCRONIZACION antes de la marca vuelve a llegar (aquí, m2)
+    assert {"m0", "nuevo"} <= set(cambiados["id"]) and "m1" not in set(cambiados["id"])
+    assert list(eliminados) == ["m1"]
+
+    df, nueva_marca = datos.sincronizar(repositorio, df, marca)
+    assert sorted(df["id"]) == ["m0", "m2", "nuevo"]
+    assert nueva_marca > marca
+
+
+# Las lápidas de un usuario no llegan a los demás ni les mueven la marca
+def test_lapidas_por_usuario(repositorio):
+    hace_un_dia = datetime.now() - timedelta(days=1)
+    repositorio.agregar(movimiento("ana", hace_un_dia), "a1")
+    repositorio.agregar(movimiento("luis", hace_un_dia), "l1")
+    marca = datetime.now() - timedelta(hours=1)
+    repositorio.de_usuario("luis").eliminar("l1")
+
+    assert repositorio.de_usuario("ana").cargar_cambios(marca)[1] == {}
+    assert list(repositorio.de_usuario("luis").cargar_cambios(marca)[1]) == ["l1"]
+    assert list(repositorio.de_usuario("ana").cargar_movimientos()["id"]) == ["a1"]
+
+
+# Reintentar un lote ya guardado no lo escribe dos veces
+def test_escribir_lote_es_idempotente(repositorio):
+    lote = [(f"m{i}", movimiento()) for i in range(3)]
+    assert repositorio.escribir_lote(lote) is True
+    assert repositorio.escribir_lote(lote) is False
+    assert len(repositorio.cargar_movimientos()) == 3
+
+
+# Lo que hace escribir_movimiento si la escritura falla: volver a poner el registro anterior
+def test_deshacer_escritura_en_memoria(repositorio):
+    repositorio.agregar(movimiento(Monto=10.0), "m0")
+    df = repositorio.cargar_movimientos()
+    anterior = datos.registro_de(df, "m0")
+
+    cambiado = datos.reemplazar_registro(df, "m0", {**anterior, "Monto": 99.0})
+    assert datos.registro_de(cambiado, "m0")["Monto"] == 99.0
+    restaurado = datos.reemplazar_registro(cambiado, "m0", anterior)
+    assert datos.registro_de(restaurado, "m0") == anterior
+
+    agregado = datos.reemplazar_registro(df, "nuevo", movimiento())
+    assert list(datos.reemplazar_registro(agregado, "nuevo", None)["id"]) == ["m0"]
+
+
+def test_cache_refresca_al_vencer_el_ttl():
+    cache = CacheCompartida(ttl=0.05)
+    assert cache.obtener("clave", cargar=lambda: 1, refrescar=lambda valor: valor + 1) == 1
+    assert cache.obtener("clave", cargar=lambda: 1, refrescar=lambda valor: valor + 1) == 1
+    time.sleep(0.06)
+    assert cache.obtener("clave", cargar=lambda: 1, refrescar=lambda valor: valor + 1) == 2
+
+
+# Se desaloja lo menos usado; las versiones no se repiten y no quedan locks ni versiones de claves quitadas
+def test_cache_desaloja_sin_acumular_claves():
+    cache = CacheCompartida(max_bytes=1000)
+    for i in range(100):
+        cache.obtener(("figura", i), cargar=lambda: "x" * 100)
+    assert cache.obtener(("figura", 0), cargar=lambda: "nuevo") == "nuevo"
+    assert len(cache._versiones) == len(cache._entradas) < 100
+    assert len(cache._locks_carga) == 0
+
+    version = cache.version(("figura", 0))
+    cache.invalidar_prefijo("figura")
+    cache.obtener(("figura", 0), cargar=lambda: "otra vez")
+    assert cache.version(("figura", 0)) > version
+
+
+# Una sola sesión carga la clave aunque la pidan varias a la vez
+def test_cache_carga_una_sola_vez():
+    cache = CacheCompartida()
+    cargas = []
+
+    def cargar():
+        cargas.append(1)
+        time.sleep(0.05)
+        return "valor"
+
+    hilos = [threading.Thread(target=cache.obtener, args=("clave", cargar)) for _ in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(cargas) == 1
+
+
+# Lo encolado y no enviado se escribe al reiniciar el proceso
+def test_cola_retoma_pendientes_al_reiniciar(repositorio, tmp_path):
+    ruta = str(tmp_path / "cola.db")
+    ColaEscritura(repositorio, ruta).encolar("m0", movimiento())
+    cola = ColaEscritura(repositorio, ruta, espera=0.01).iniciar()
+    esperar(lambda: cola.pendientes() == 0)
+    assert cola.estados(["m0"])["m0"][0] == "confirmado"
+    assert list(repositorio.cargar_movimientos()["id"]) == ["m0"]
+
+
+# Un movimiento que esperó en la cola más que MARGEN_SINCRONIZACION igual llega por la sincronización
+def test_cola_escritura_tardia_llega_por_sincronizacion(repositorio, tmp_path):
+    repositorio.agregar(movimiento(), "m0")
+    df, marca = datos.sincronizar(repositorio, None, None)
+
+    cola = ColaEscritura(repositorio, str(tmp_path / "cola.db"), espera=0.01)
+    cola.encolar("tarde", movimiento(registrado=datetime.now() - timedelta(hours=1)))
+    cola.iniciar()
+    esperar(lambda: cola.pendientes() == 0)
+
+    df, _ = datos.sincronizar(repositorio, df, marca)
+    assert sorted(df["id"]) == ["m0", "tarde"]
+
+
+# Un error permanente deja con error solo al movimiento que falla y la cola sigue
+def test_cola_aisla_errores_permanentes(repositorio, tmp_path):
+    escribir_lote = repositorio.escribir_lote
+
+    def falla_con_invalido(lote):
+        if any(registro["Comentario"] == "inválido" for _, registro in lote):
+            raise exceptions.InvalidArgument("valor inválido")
+        return escribir_lote(lote)
+
+    repositorio.escribir_lote = falla_con_invalido
+    fallidos = []
+    cola = ColaEscritura(repositorio, str(tmp_path / "cola.db"), al_fallar=fallidos.extend, espera=0.01)
+    for i, comentario in enumerate(["", "inválido", ""]):
+        cola.encolar(f"m{i}", movimiento(Comentario=comentario))
+    cola.iniciar()
+    esperar(lambda: cola.pendientes() == 0)
+
+    estados = cola.estados(["m0", "m1", "m2"])
+    assert {doc_id: estado for doc_id, (estado, _, _) in estados.items()} == {"m0": "confirmado", "m1": "error", "m2": "confirmado"}
+    assert "valor inválido" in estados["m1"][2]
+    assert [doc_id for doc_id, _ in fallidos] == ["m1"]
+    assert sorted(repositorio.cargar_movimientos()["id"]) == ["m0", "m2"]
+
+
+# Un error pasajero se reintenta hasta que se puede escribir
+def test_cola_reintenta_errores_pasajeros(repositorio, tmp_path):
+    escribir_lote = repositorio.escribir_lote
+    fallos = [exceptions.ServiceUnavailable("sin conexión")]
+
+    def falla_una_vez(lote):
+        if fallos:
+            raise fallos.pop()
+        return escribir_lote(lote)
+
+    repositorio.escribir_lote = falla_una_vez
+    cola = ColaEscritura(repositorio, str(tmp_path / "cola.db"), espera=0.01).iniciar()
+    cola.encolar("m0", movimiento())
+    esperar(lambda: cola.pendientes() == 0)
+    assert cola.estados(["m0"])["m0"][0] == "confirmado"
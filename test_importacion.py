@@ -0,0 +1,35 @@
+from almacenamiento import RepositorioMemoria
+from importacion import clave_importacion, importar, leer_archivo, normalizar_columnas, preparar_registros, validar
+
+EXTRACTO = (
+    "Fecha,Tipo,Categoría,Detalle,Subdetalle,Forma de pago,Monto,Comentario\n"
+    "05/03/2026,Egreso,Alimentos,Carne,-,BCP,25.50,mercado\n"
+    "06/03/2026,Egreso,Alimentos,Pollo,-,BCP,18.00,mercado\n"
+).encode()
+
+
+def importar_como(repositorio, usuario, carpeta):
+    df, huella = leer_archivo(EXTRACTO, "extracto.csv")
+    validos, errores = validar(normalizar_columnas(df))
+    assert errores.empty
+    return importar(repositorio, preparar_registros(validos, usuario, huella), clave_importacion(usuario, huella), carpeta=carpeta)
+
+
+# El mismo extracto importado por dos usuarios queda para los dos; reimportarlo no duplica nada
+def test_mismo_archivo_de_dos_usuarios(tmp_path):
+    repositorio = RepositorioMemoria()
+    carpeta = str(tmp_path / "progreso")
+
+    assert importar_como(repositorio, "ana", carpeta) == 2
+    assert importar_como(repositorio, "luis", carpeta) == 2
+    assert importar_como(repositorio, "luis", carpeta) == 0
+
+    for usuario in ["ana", "luis"]:
+        movimientos = repositorio.de_usuario(usuario).cargar_movimientos()
+        assert len(movimientos) == 2
+        assert set(movimientos["Usuario"]) == {usuario}
+
+
+def test_clave_no_confunde_usuarios():
+    assert clave_importacion("juan.perez", "abc") != clave_importacion("juan_perez", "abc")
+    assert "/" not in clave_importacion("a/b", "abc")
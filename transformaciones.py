@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+MESES_ES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+# Un ingreso que llega a menos de estos días de fin de mes se cuenta en el mes siguiente
+DIAS_CORTE_INGRESO = 7
+
+
+# Etiqueta en español para un periodo "YYYY-MM", p. ej. "Ene 2025"
+def etiqueta_mes(mes):
+    anio, numero = mes.split("-")
+    return f"{MESES_ES[int(numero) - 1]} {anio}"
+
+
+# Ventanas de `tamano` meses, de la más reciente hacia atrás, como (primer mes, último mes).
+# meses es la lista ordenada de periodos "YYYY-MM" disponibles.
+def ventanas_de_meses(meses, cantidad, tamano):
+    ventanas = []
+    fin = len(meses)
+    while fin > 0 and len(ventanas) < cantidad:
+        inicio = max(0, fin - tamano)
+        ventanas.append((meses[inicio], meses[fin - 1]))
+        fin = inicio
+    return ventanas
+
+
+# Cuántas ventanas hacen falta para llegar al mes más antiguo de la selección
+def ventanas_necesarias(meses, seleccion, tamano):
+    posiciones = [meses.index(m) for m in seleccion if m in meses]
+    if not posiciones:
+        return 1
+    return -(-(len(meses) - min(posiciones)) // tamano)
+
+
+# Agrega Mes, Mes_Ordenado y Mes_Label a partir de Fecha_Real.
+# Se trabaja con el número de mes (año * 12 + mes) y solo se arman textos para los meses distintos.
+def agregar_columnas_mes(df):
+    fechas = df["Fecha_Real"]
+    validas = fechas.notna().to_numpy()
+    ordinal = (fechas.dt.year * 12 + fechas.dt.month - 1).to_numpy(dtype="float64")
+    ordinal = np.where(validas, ordinal, -1).astype("int64")
+
+    unicos = np.unique(ordinal[validas])
+    codigos = np.searchsorted(unicos, ordinal)
+    codigos[~validas] = -1
+
+    meses = [f"{o // 12:04d}-{o % 12 + 1:02d}" for o in unicos]
+    etiquetas = [f"{MESES_ES[o % 12]} {o // 12}" for o in unicos]
+    return df.assign(
+        Mes=pd.Categorical.from_codes(codigos, categories=meses, ordered=True),
+        Mes_Ordenado=fechas.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype("datetime64[ns]"),
+        Mes_Label=pd.Categorical.from_codes(codigos, categories=etiquetas, ordered=True),
+    )
+
+
+# Fecha_Real para muchas filas a la vez: mismo criterio que el formulario de registro
+def calcular_fecha_real(fechas, tipos, dias_corte=DIAS_CORTE_INGRESO):
+    fechas = pd.to_datetime(fechas).dt.normalize()
+    primero_mes_siguiente = fechas + pd.offsets.MonthBegin(1)
+    correr = (tipos == "Ingreso") & ((primero_mes_siguiente - fechas).dt.days < dias_corte)
+    return fechas.where(~correr, primero_mes_siguiente)
+
+
+# Fecha_Real de un solo movimiento (formularios de registro y edición), con la misma regla
+def fecha_real_movimiento(fecha, tipo, dias_corte=DIAS_CORTE_INGRESO):
+    return calcular_fecha_real(pd.Series([pd.Timestamp(fecha)]), pd.Series([tipo]), dias_corte).iloc[0].date()